@@ -0,0 +1,194 @@
+"""
+Response Cache
+
+TTL key/value cache for built response models. With REDIS_URL set, entries are
+stored as JSON in Redis and shared by every worker; otherwise the model objects
+themselves are kept in process memory.
+"""
+import hashlib
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Type, TypeVar
+from pydantic import BaseModel
+from app.core.redis_client import redis_client
+
+
+M = TypeVar("M", bound=BaseModel)
+
+_LOCAL_MAX_KEYS = 10_000
+
+
+class Cache:
+    def __init__(self):
+        self._local: Dict[str, Tuple[float, Any]] = {}
+
+    @property
+    def shared(self) -> bool:
+        return redis_client is not None
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        if not keys:
+            return []
+        if redis_client is not None:
+            return await redis_client.mget(keys)
+
+        now = time.monotonic()
+        values = []
+        for key in keys:
+            entry = self._local.get(key)
+            values.append(entry[1] if entry and entry[0] > now else None)
+        return values
+
+    async def set_many(self, items: Dict[str, Any], ttl: int) -> None:
+        if not items:
+            return
+        if redis_client is not None:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(key, value, ex=ttl)
+                await pipe.execute()
+            return
+
+        now = time.monotonic()
+        if len(self._local) + len(items) > _LOCAL_MAX_KEYS:
+            self._local = {k: v for k, v in self._local.items() if v[0] > now}
+            if len(self._local) + len(items) > _LOCAL_MAX_KEYS:
+                self._local.clear()
+        expires_at = now + ttl
+        for key, value in items.items():
+            self._local[key] = (expires_at, value)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return (await self.get_many([key]))[0]
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        await self.set_many({key: value}, ttl)
+
+    async def add(self, key: str, value: Any, ttl: int) -> bool:
+        """Store `value` only if `key` holds nothing; True when it was stored."""
+        if redis_client is not None:
+            return bool(await redis_client.set(key, value, ex=ttl, nx=True))
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        if redis_client is not None:
+            await redis_client.delete(*keys)
+            return
+        for key in keys:
+            self._local.pop(key, None)
+
+
+cache = Cache()
+
+PROFILE_RESPONSE_TTL = 3600
+
+# Per-user list responses; dropped by the endpoints that change them, and short
+# enough that edits elsewhere (project titles, other users' profiles) age out.
+USER_LIST_TTL = 60
+
+
+# Public team list of a project; dropped whenever a member joins, leaves or is removed.
+PROJECT_TEAM_TTL = 300
+
+
+def project_team_key(project_id: int) -> str:
+    return f"team:{project_id}"
+
+
+# Project detail response, team included, behind a header line with its ETag
+# and viewers. Dropped on project edits, new applications and team changes;
+# profile edits age out with the TTL.
+PROJECT_RESPONSE_TTL = 60
+
+
+def project_response_key(project_id: int) -> str:
+    return f"project:detail:{project_id}"
+
+
+# Public project feed pages, keyed by their filters and a generation that every
+# project write (and new application) bumps. Creator profile edits age out with the TTL.
+PROJECT_FEED_TTL = 60
+PROJECT_FEED_GENERATION_KEY = "projects:feed:gen"
+_PROJECT_FEED_GENERATION_TTL = 86400  # must outlive PROJECT_FEED_TTL
+
+
+def project_feed_key(generation: Optional[Any], params: tuple) -> str:
+    if isinstance(generation, bytes):
+        generation = generation.decode()
+    digest = hashlib.blake2b(repr(params).encode(), digest_size=16).hexdigest()
+    return f"projects:feed:{generation or 0}:{digest}"
+
+
+async def bump_project_feed() -> None:
+    """Retire every cached feed page; called after a project is created or changed."""
+    await cache.set(PROJECT_FEED_GENERATION_KEY, str(time.time_ns()), _PROJECT_FEED_GENERATION_TTL)
+
+
+def my_applications_key(user_id: int) -> str:
+    return f"apps:my:{user_id}"
+
+
+def my_collaborations_key(user_id: int) -> str:
+    return f"colls:my:{user_id}"
+
+
+# Profile response looked up by user id (profile pages, message senders). Dropped on profile
+# writes; without Redis other workers may serve the old one until it expires.
+USER_PROFILE_TTL = 300
+
+
+def user_profile_key(user_id: int) -> str:
+    return f"profile:user:{user_id}"
+
+
+# Last message time a user's conversation was marked read at; a repeat open with
+# no newer message skips the write.
+CONVERSATION_READ_TTL = 300
+
+
+def conversation_read_key(conversation_id: int, user_id: int) -> str:
+    return f"read:{conversation_id}:{user_id}"
+
+
+def profile_cache_key(profile) -> str:
+    """Versioned by updated_at, so an edited profile never serves a stale entry."""
+    version = int(profile.updated_at.timestamp() * 1_000_000) if profile.updated_at else 0
+    return f"profile:{profile.id}:{version}"
+
+
+async def get_or_build_models(
+    objects: Iterable[Any],
+    model: Type[M],
+    key: Callable[[Any], str],
+    ident: Callable[[Any], Hashable],
+    build: Callable[[Any], M],
+    ttl: int,
+) -> Dict[Hashable, M]:
+    """
+    Fetch response models for `objects` from the cache in one round-trip,
+    building and storing any misses. Returns {ident(obj): model}.
+    """
+    unique = {ident(obj): obj for obj in objects if obj is not None}
+    if not unique:
+        return {}
+
+    idents = list(unique)
+    keys = [key(unique[i]) for i in idents]
+    cached = await cache.get_many(keys)
+
+    result: Dict[Hashable, M] = {}
+    misses: Dict[str, Any] = {}
+    for i, k, value in zip(idents, keys, cached):
+        if value is not None:
+            result[i] = model.model_validate_json(value) if cache.shared else value
+            continue
+        built = build(unique[i])
+        result[i] = built
+        misses[k] = built.model_dump_json() if cache.shared else built
+
+    await cache.set_many(misses, ttl)
+    return result
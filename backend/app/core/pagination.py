@@ -0,0 +1,28 @@
+"""
+Keyset Pagination
+
+Opaque cursors for lists ordered by (created_at DESC, id DESC). A cursor names
+the last row of a page; the next page starts strictly after it, so the database
+range-scans from there instead of counting past an offset.
+"""
+import base64
+from datetime import datetime
+from typing import Tuple
+
+# Response header carrying the cursor for the next (older) page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for anything encode_cursor did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,98 @@
+"""
+Request Rate Limiting
+
+Fixed-window counters (count_attempt): RateLimiter keys them by route and
+client IP, the verification service by action and address. With REDIS_URL set
+the counter lives in Redis (one transactional SET NX EX + INCR), shared by
+every worker; otherwise it is kept in process memory.
+
+Behind a reverse proxy every connection comes from the proxy, so the client IP
+is taken from X-Forwarded-For, but only when the peer is listed in
+TRUSTED_PROXIES; anyone else could put any address there.
+"""
+import time
+from ipaddress import ip_address, ip_network
+from typing import Dict, Tuple
+from fastapi import HTTPException, Request, status
+from app.core.config import settings
+from app.core.redis_client import redis_client
+
+
+_TRUSTED_PROXIES = [
+    ip_network(entry.strip(), strict=False)
+    for entry in settings.TRUSTED_PROXIES.split(",") if entry.strip()
+]
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        addr = ip_address(host)
+    except ValueError:
+        return False
+    return any(addr in network for network in _TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    """
+    The peer address, or for a request relayed by trusted proxies the nearest
+    X-Forwarded-For hop that is not one of them (hops left of it are client-supplied).
+    """
+    host = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(host):
+        return host
+    for hop in reversed(request.headers.get("x-forwarded-for", "").split(",")):
+        hop = hop.strip()
+        if not hop:
+            continue
+        host = hop
+        if not _is_trusted_proxy(hop):
+            break
+    return host
+
+
+# key -> (window_expires_at, hits), used only without Redis
+_local_windows: Dict[str, Tuple[float, int]] = {}
+_LOCAL_MAX_KEYS = 10_000
+
+
+async def count_attempt(key: str, seconds: int) -> int:
+    """
+    Count one attempt against `key` and return the attempts in its current
+    `seconds`-long window, which starts at the first attempt.
+    """
+    if redis_client is not None:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            # The first hit creates the counter with the window as its TTL; INCR
+            # keeps that TTL (plain SET NX EX works on any Redis version)
+            pipe.set(key, 0, ex=seconds, nx=True)
+            pipe.incr(key)
+            _, hits = await pipe.execute()
+        return hits
+    
+    now = time.monotonic()
+    expires_at, hits = _local_windows.get(key, (0.0, 0))
+    if expires_at <= now:
+        if len(_local_windows) >= _LOCAL_MAX_KEYS:
+            for k in [k for k, (exp, _) in _local_windows.items() if exp <= now]:
+                del _local_windows[k]
+        expires_at, hits = now + seconds, 0
+    hits += 1
+    _local_windows[key] = (expires_at, hits)
+    return hits
+
+
+class RateLimiter:
+    """Dependency allowing `times` requests per `seconds` per client IP on a route."""
+    
+    def __init__(self, times: int, seconds: int):
+        self.times = times
+        self.seconds = seconds
+    
+    async def __call__(self, request: Request) -> None:
+        key = f"rl:{request.scope['route'].path}:{client_ip(request)}"
+        if await count_attempt(key, self.seconds) > self.times:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests. Please try again later.",
+                headers={"Retry-After": str(self.seconds)},
+            )
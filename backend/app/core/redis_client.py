@@ -0,0 +1,17 @@
+"""
+Shared Redis client.
+
+`redis_client` is None when REDIS_URL is not configured; callers fall back to
+per-process state in that case.
+"""
+from typing import Optional
+from redis.asyncio import Redis
+from app.core.config import settings
+
+
+redis_client: Optional[Redis] = Redis.from_url(settings.REDIS_URL) if settings.REDIS_URL else None
+
+
+async def close_redis() -> None:
+    if redis_client is not None:
+        await redis_client.aclose()
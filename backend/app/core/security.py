@@ -1,16 +1,184 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
-from jose import JWTError, jwt
+from typing import Optional, Tuple, Union
+import base64
+import binascii
+import hmac
+import time
+from collections import OrderedDict
 import bcrypt
+import orjson
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from anyio import to_thread
 from app.core.config import settings
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+class JWTError(Exception):
+    """Raised when a token is malformed, has a bad signature or has expired."""
+    pass
+
+
+# HMAC-SHA JWT signer. The key is encoded once at import and every signature is a
+# single OpenSSL one-shot hmac.digest() call instead of a per-token HMAC setup.
+_JWT_DIGESTS = {"HS256": "sha256", "HS384": "sha384", "HS512": "sha512"}
+
+if settings.ALGORITHM not in _JWT_DIGESTS:
+    raise RuntimeError(f"Unsupported JWT ALGORITHM {settings.ALGORITHM!r}; use one of {sorted(_JWT_DIGESTS)}")
+
+_JWT_ALG = settings.ALGORITHM
+_JWT_KEY = settings.SECRET_KEY.encode('utf-8')
+_JWT_DIGEST = _JWT_DIGESTS[_JWT_ALG]
+
+# Token lifetimes, read once instead of through the settings object per token
+_ACCESS_TOKEN_TTL = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+_REFRESH_TOKEN_TTL = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+_EMAIL_VERIFICATION_TOKEN_TTL = timedelta(hours=24)
+_PASSWORD_RESET_TOKEN_TTL = timedelta(hours=1)  # Shorter expiry for security
+
+
+def _b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def _b64url_decode(data: bytes) -> bytes:
+    """
+    Unpadded base64url, accepted only in the canonical form _b64url_encode
+    produces. A lenient decoder skips stray characters and ignores the unused
+    low bits of the last character, so one signature would have many valid
+    spellings.
+    """
+    decoded = base64.b64decode(data + b'=' * (-len(data) % 4), altchars=b'-_', validate=True)
+    if _b64url_encode(decoded) != data:
+        raise ValueError("Non-canonical base64url")
+    return decoded
+
+
+# The header never changes, so it is serialized and base64url-encoded once at import
+_JWT_HEADER_SEGMENT = _b64url_encode(orjson.dumps({"alg": _JWT_ALG, "typ": "JWT"}))
+
+
+def _jwt_encode(payload: dict) -> str:
+    claims = dict(payload)
+    exp = claims.get("exp")
+    if isinstance(exp, datetime):
+        # orjson would emit an ISO string; JWT requires NumericDate seconds
+        claims["exp"] = int(exp.timestamp())
+    signing_input = _JWT_HEADER_SEGMENT + b'.' + _b64url_encode(orjson.dumps(claims))
+    signature = hmac.digest(_JWT_KEY, signing_input, _JWT_DIGEST)
+    return (signing_input + b'.' + _b64url_encode(signature)).decode('ascii')
+
+
+def _jwt_decode(token: str) -> dict:
+    try:
+        signing_input, _, signature = token.encode('ascii').rpartition(b'.')
+        header_segment, _, payload_segment = signing_input.partition(b'.')
+        if not header_segment or not payload_segment or b'.' in payload_segment:
+            raise JWTError("Malformed token")
+        
+        # Tokens we issued carry the exact precomputed header; only parse foreign ones
+        if header_segment != _JWT_HEADER_SEGMENT:
+            header = orjson.loads(_b64url_decode(header_segment))
+            if not isinstance(header, dict) or header.get("alg") != _JWT_ALG:
+                raise JWTError("Unexpected token algorithm")
+        
+        expected = hmac.digest(_JWT_KEY, signing_input, _JWT_DIGEST)
+        if not hmac.compare_digest(expected, _b64url_decode(signature)):
+            raise JWTError("Signature verification failed")
+        
+        payload = orjson.loads(_b64url_decode(payload_segment))
+    except (ValueError, binascii.Error) as e:  # covers UnicodeError and orjson.JSONDecodeError
+        raise JWTError("Malformed token") from e
+    
+    if not isinstance(payload, dict):
+        raise JWTError("Malformed token")
+    
+    exp = payload.get("exp")
+    if exp is not None:
+        if isinstance(exp, bool) or not isinstance(exp, (int, float)):
+            raise JWTError("Invalid expiration claim")
+        if exp <= datetime.now(timezone.utc).timestamp():
+            raise JWTError("Token has expired")
+    
+    return payload
+
+
+_password_hasher = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
+)
+
+
+def _is_bcrypt_hash(hashed_password: Union[str, bytes]) -> bool:
+    prefix = "$2" if isinstance(hashed_password, str) else b"$2"
+    return hashed_password.startswith(prefix)
+
+
+def verify_password(plain_password: str, hashed_password: Union[str, bytes]) -> bool:
+    if _is_bcrypt_hash(hashed_password):
+        # Legacy bcrypt hash; bcrypt hashes are pure ASCII
+        if isinstance(hashed_password, str):
+            hashed_password = hashed_password.encode('ascii')
+        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password)
+    
+    if isinstance(hashed_password, bytes):
+        hashed_password = hashed_password.decode('ascii')
+    try:
+        return _password_hasher.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True for legacy bcrypt hashes and argon2 hashes made with outdated parameters."""
+    if _is_bcrypt_hash(hashed_password):
+        return True
+    try:
+        return _password_hasher.check_needs_rehash(hashed_password)
+    except InvalidHashError:
+        return True
 
 
 def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return _password_hasher.hash(password)
+
+
+async def averify_password(plain_password: str, hashed_password: Union[str, bytes]) -> bool:
+    """Run password verification in the worker thread pool so it doesn't block the event loop."""
+    return await to_thread.run_sync(verify_password, plain_password, hashed_password)
+
+
+# Recent login verdicts, so a burst of retries with the same password costs one
+# KDF run. Keyed by an HMAC of the stored hash and the attempted password (never
+# the password itself): a password change retires its entries, and the TTL
+# bounds how long a verdict is trusted. Per process.
+_VERIFY_CACHE_TTL = 30
+# Derived from SECRET_KEY so the JWT signing key is used for nothing else
+_VERIFY_CACHE_KEY = hmac.digest(_JWT_KEY, b"login-verdict", 'sha256')
+_VERIFY_CACHE_SIZE = 1024
+_verify_cache: "OrderedDict[bytes, Tuple[float, bool]]" = OrderedDict()
+
+
+async def averify_password_cached(plain_password: str, hashed_password: Union[str, bytes]) -> bool:
+    stored = hashed_password.encode('ascii') if isinstance(hashed_password, str) else hashed_password
+    key = hmac.digest(_VERIFY_CACHE_KEY, stored + b'\0' + plain_password.encode('utf-8'), 'sha256')
+    now = time.monotonic()
+    entry = _verify_cache.get(key)
+    if entry is not None and entry[0] > now:
+        _verify_cache.move_to_end(key)
+        return entry[1]
+    
+    verified = await averify_password(plain_password, hashed_password)
+    _verify_cache[key] = (now + _VERIFY_CACHE_TTL, verified)
+    _verify_cache.move_to_end(key)
+    if len(_verify_cache) > _VERIFY_CACHE_SIZE:
+        _verify_cache.popitem(last=False)
+    return verified
+
+
+async def aget_password_hash(password: str) -> str:
+    """Run password hashing in the worker thread pool so it doesn't block the event loop."""
+    return await to_thread.run_sync(get_password_hash, password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, token_version: int = 0) -> str:
@@ -18,37 +186,37 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, t
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.now(timezone.utc) + _ACCESS_TOKEN_TTL
     to_encode.update({"exp": expire, "type": "access", "tv": token_version})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = _jwt_encode(to_encode)
     return encoded_jwt
 
 
 def create_refresh_token(data: dict, token_version: int = 0) -> str:
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    expire = datetime.now(timezone.utc) + _REFRESH_TOKEN_TTL
     to_encode.update({"exp": expire, "type": "refresh", "tv": token_version})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = _jwt_encode(to_encode)
     return encoded_jwt
 
 
 def decode_token(token: str) -> Optional[dict]:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = _jwt_decode(token)
         return payload
     except JWTError:
         return None
 
 
 def create_email_verification_token(email: str) -> str:
-    expire = datetime.now(timezone.utc) + timedelta(hours=24)
+    expire = datetime.now(timezone.utc) + _EMAIL_VERIFICATION_TOKEN_TTL
     to_encode = {"sub": email, "exp": expire, "type": "email_verification"}
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return _jwt_encode(to_encode)
 
 
 def verify_email_token(token: str) -> Optional[str]:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = _jwt_decode(token)
         if payload.get("type") != "email_verification":
             return None
         return payload.get("sub")
@@ -58,15 +226,15 @@ def verify_email_token(token: str) -> Optional[str]:
 
 def create_password_reset_token(email: str) -> str:
     """Create a dedicated password reset token (separate from email verification)."""
-    expire = datetime.now(timezone.utc) + timedelta(hours=1)  # Shorter expiry for security
+    expire = datetime.now(timezone.utc) + _PASSWORD_RESET_TOKEN_TTL
     to_encode = {"sub": email, "exp": expire, "type": "password_reset"}
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return _jwt_encode(to_encode)
 
 
 def verify_password_reset_token(token: str) -> Optional[str]:
     """Verify a password reset token. Returns email if valid, None otherwise."""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = _jwt_decode(token)
         if payload.get("type") != "password_reset":
             return None
         return payload.get("sub")
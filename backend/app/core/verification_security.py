@@ -3,6 +3,8 @@ Verification Security Utilities
 
 Cryptographically secure OTP and token generation with constant-time comparison.
 """
+import os
+import base64
 import secrets
 import hashlib
 import hmac
@@ -24,20 +26,32 @@ def generate_otp() -> str:
     return str(otp).zfill(OTP_LENGTH)
 
 
+def _encode_link_token(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
 def generate_link_token() -> str:
     """Generate a URL-safe verification token."""
-    return secrets.token_urlsafe(LINK_TOKEN_BYTES)
+    return _encode_link_token(os.urandom(LINK_TOKEN_BYTES))
+
+
+def hash_token(token: str) -> bytes:
+    """Hash token with SHA-256 (raw 32-byte digest)."""
+    return hashlib.sha256(token.encode('utf-8')).digest()
 
 
-def hash_token(token: str) -> str:
-    """Hash token with SHA-256."""
+def hash_token_hex(token: str) -> str:
+    """Hash token with SHA-256 as hex, the form stored in the database."""
     return hashlib.sha256(token.encode('utf-8')).hexdigest()
 
 
 def verify_token_hash(token: str, stored_hash: str) -> bool:
-    """Constant-time comparison of token hash."""
-    computed_hash = hash_token(token)
-    return hmac.compare_digest(computed_hash, stored_hash)
+    """Constant-time comparison of token hash against the stored hex digest."""
+    try:
+        stored = bytes.fromhex(stored_hash)
+    except ValueError:
+        return False
+    return hmac.compare_digest(hash_token(token), stored)
 
 
 def generate_verification_data() -> Tuple[str, str, str, str, datetime, datetime]:
@@ -49,14 +63,18 @@ def generate_verification_data() -> Tuple[str, str, str, str, datetime, datetime
     """
     now = datetime.now(timezone.utc)
     
+    # One CSPRNG read covers both secrets: 8 bytes for the OTP (modulo bias
+    # below 2**-44) and LINK_TOKEN_BYTES for the link token.
+    raw = os.urandom(8 + LINK_TOKEN_BYTES)
+    
     # Generate OTP
-    otp = generate_otp()
-    otp_hash = hash_token(otp)
+    otp = str(int.from_bytes(raw[:8], 'big') % 10 ** OTP_LENGTH).zfill(OTP_LENGTH)
+    otp_hash = hash_token_hex(otp)
     otp_expires_at = now + timedelta(minutes=OTP_EXPIRY_MINUTES)
     
     # Generate link token
-    link_token = generate_link_token()
-    link_token_hash = hash_token(link_token)
+    link_token = _encode_link_token(raw[8:])
+    link_token_hash = hash_token_hex(link_token)
     link_expires_at = now + timedelta(minutes=LINK_EXPIRY_MINUTES)
     
     return otp, otp_hash, link_token, link_token_hash, otp_expires_at, link_expires_at
@@ -79,6 +97,8 @@ def mask_email(email: str) -> str:
     
     Example: 'user@example.com' -> 'u***@e***.com'
     """
+    if '@' not in email:
+        return '***@***.***'
     try:
         local, domain = email.split('@')
         domain_parts = domain.split('.')
@@ -1,9 +1,44 @@
+from uuid import uuid4
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import NullPool
 from app.core.config import settings
 
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
+if settings.DB_BEHIND_PGBOUNCER:
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        echo=False,
+        poolclass=NullPool,
+        # Transaction pooling hands each statement to any server connection, so
+        # nothing may be prepared under a name another client could reuse
+        connect_args={
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        },
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    )
+else:
+    connect_args = {}
+    if make_url(settings.DATABASE_URL).get_driver_name() == "asyncpg":
+        # asyncpg's own cache and SQLAlchemy's per-connection one in front of it
+        connect_args = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        echo=False,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    )
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
@@ -21,4 +56,6 @@ async def get_db():
 
 async def create_tables():
     async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
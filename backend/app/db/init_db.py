@@ -0,0 +1,25 @@
+"""
+Create database tables, upgrade existing ones (see app.db.migrations) and tidy
+the avatar upload directory.
+
+Run once per deploy, before the API workers start:
+
+    python -m app.db.init_db
+"""
+import asyncio
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.db.database import create_tables, engine
+from app.db.migrations import run_migrations
+from app.routers.profile import tidy_avatar_files
+
+
+async def main() -> None:
+    await create_tables()
+    async with engine.begin() as conn:
+        await run_migrations(conn)
+    await tidy_avatar_files()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
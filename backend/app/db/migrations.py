@@ -0,0 +1,193 @@
+"""
+Database Upgrades
+
+create_all only creates missing tables; it never changes a table that already
+exists. These steps bring a database created by an older version of the models
+up to date. Each one inspects the live schema first and does nothing when the
+change is already in place, so init_db runs all of them on every deploy.
+"""
+import logging
+from typing import Dict, List
+from sqlalchemy import Integer, bindparam, inspect, select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.orm import Session
+from app.db.database import Base
+from app.db.types import IntEnumType, enum_code
+from app.models import Profile, compute_profile_completeness
+
+logger = logging.getLogger(__name__)
+
+
+async def _columns(conn: AsyncConnection, table: str) -> Dict[str, dict]:
+    """The live columns of `table` by name; empty when the table doesn't exist."""
+    def read(sync_conn) -> Dict[str, dict]:
+        inspector = inspect(sync_conn)
+        if not inspector.has_table(table):
+            return {}
+        return {column["name"]: column for column in inspector.get_columns(table)}
+    return await conn.run_sync(read)
+
+
+async def _enum_columns_to_codes(conn: AsyncConnection) -> None:
+    """
+    IntEnumType columns used to be native Postgres enums holding member names.
+    Rewrite each one to its SMALLINT codes, then drop the enum types.
+    """
+    enum_types = set()
+    for table in Base.metadata.sorted_tables:
+        live = await _columns(conn, table.name)
+        for column in table.columns:
+            if not isinstance(column.type, IntEnumType) or column.name not in live:
+                continue
+            live_type = live[column.name]["type"]
+            if isinstance(live_type, Integer):
+                continue
+            if conn.dialect.name != "postgresql":
+                raise RuntimeError(
+                    f"{table.name}.{column.name} still stores enum names; recreate this development database"
+                )
+            cases = " ".join(
+                f"WHEN '{member.name}' THEN {enum_code(member)}" for member in column.type.enum_class
+            )
+            await conn.execute(text(
+                f"ALTER TABLE {table.name} ALTER COLUMN {column.name} TYPE SMALLINT "
+                f"USING CASE {column.name}::text {cases} END"
+            ))
+            if getattr(live_type, "name", None):
+                enum_types.add(live_type.name)
+            logger.info("Converted %s.%s to enum codes", table.name, column.name)
+    for name in sorted(enum_types):
+        await conn.execute(text(f'DROP TYPE IF EXISTS "{name}"'))
+
+
+def _json_array_elements(dialect: str, column: str) -> str:
+    """FROM item yielding `value` for each element of a JSON array column (anything else yields nothing)."""
+    if dialect == "postgresql":
+        return (
+            f"json_array_elements_text(CASE WHEN json_typeof({column}::json) = 'array' "
+            f"THEN {column}::json ELSE '[]'::json END) AS e(value)"
+        )
+    return f"json_each(CASE WHEN json_type({column}) = 'array' THEN {column} ELSE '[]' END) AS e"
+
+
+async def _move_json_ids(
+    conn: AsyncConnection, table: str, json_column: str, target: str, target_column: str
+) -> None:
+    """Copy user ids from the JSON array `table.json_column` into `target` rows, then drop the column."""
+    if json_column not in await _columns(conn, table):
+        return
+    elements = _json_array_elements(conn.dialect.name, f"t.{json_column}")
+    result = await conn.execute(text(
+        f"INSERT INTO {target} ({target_column}, user_id) "
+        f"SELECT DISTINCT t.id, CAST(e.value AS INTEGER) FROM {table} AS t CROSS JOIN {elements} "
+        f"JOIN users AS u ON u.id = CAST(e.value AS INTEGER) "
+        f"WHERE true ON CONFLICT DO NOTHING"
+    ))
+    await conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {json_column}"))
+    logger.info("Moved %s.%s into %s (%s rows)", table, json_column, target, result.rowcount)
+
+
+async def _move_conversation_members(conn: AsyncConnection) -> None:
+    """Conversation.participant_ids and Message.read_by became association tables."""
+    await _move_json_ids(conn, "conversations", "participant_ids", "conversation_participants", "conversation_id")
+    await _move_json_ids(conn, "messages", "read_by", "message_reads", "message_id")
+
+
+async def _backfill_profile_completeness(conn: AsyncConnection) -> None:
+    """
+    profile_completeness became a stored column, kept current on every profile
+    write. Add it where missing and score the rows still at 0.
+    """
+    live = await _columns(conn, "profiles")
+    if not live:
+        return
+    if "profile_completeness" not in live:
+        await conn.execute(text(
+            "ALTER TABLE profiles ADD COLUMN profile_completeness INTEGER NOT NULL DEFAULT 0"
+        ))
+
+    def read_scores(sync_conn) -> List[dict]:
+        with Session(bind=sync_conn) as session:
+            profiles = session.scalars(select(Profile).where(Profile.profile_completeness == 0))
+            scores = [(profile.id, compute_profile_completeness(profile)) for profile in profiles]
+        return [{"profile_id": profile_id, "score": score} for profile_id, score in scores if score]
+    scores = await conn.run_sync(read_scores)
+    if scores:
+        # Backfilled, not edited: updated_at is kept rather than bumped by onupdate
+        await conn.execute(
+            update(Profile.__table__)
+            .where(Profile.__table__.c.id == bindparam("profile_id"))
+            .values(profile_completeness=bindparam("score"), updated_at=Profile.__table__.c.updated_at),
+            scores,
+        )
+        logger.info("Scored profile_completeness for %s profiles", len(scores))
+
+
+async def _drop_replaced_constraints(conn: AsyncConnection) -> None:
+    """Constraints whose replacement index _create_missing_indexes adds."""
+    if conn.dialect.name != "postgresql":
+        return
+    # Became uq_applications_project_applicant_open, which ignores closed applications
+    await conn.execute(text(
+        "ALTER TABLE applications DROP CONSTRAINT IF EXISTS uq_application_project_applicant"
+    ))
+
+
+async def _case_insensitive_emails(conn: AsyncConnection) -> None:
+    """
+    users.email was unique as typed; ix_users_email_lower makes it unique
+    ignoring case. Stop if existing accounts already differ only by case, since
+    which one to keep is not ours to decide. Otherwise store every address
+    lower-cased, as create_user now does, and drop the old uniqueness.
+    """
+    if "email" not in await _columns(conn, "users"):
+        return
+    duplicates = (await conn.execute(text(
+        "SELECT lower(email) FROM users GROUP BY lower(email) HAVING count(*) > 1"
+    ))).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            f"users.email has accounts differing only by case: {', '.join(duplicates)}; "
+            f"merge or rename them, then run init_db again"
+        )
+    await conn.execute(text("UPDATE users SET email = lower(email) WHERE email <> lower(email)"))
+    await conn.execute(text("DROP INDEX IF EXISTS ix_users_email"))
+    if conn.dialect.name == "postgresql":
+        await conn.execute(text("ALTER TABLE users DROP CONSTRAINT IF EXISTS users_email_key"))
+
+
+async def _create_missing_indexes(conn: AsyncConnection) -> None:
+    """create_all adds indexes only along with a new table; add the ones defined since."""
+    # Listed from the catalog: the inspector leaves out expression indexes on SQLite
+    if conn.dialect.name == "postgresql":
+        names = "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()"
+    else:
+        names = "SELECT name FROM sqlite_master WHERE type = 'index'"
+    existing = set((await conn.execute(text(names))).scalars())
+    
+    def create(sync_conn) -> None:
+        inspector = inspect(sync_conn)
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(sync_conn)
+                    logger.info("Created index %s", index.name)
+    await conn.run_sync(create)
+
+
+# In order: later steps may rely on the enum columns already holding codes
+_STEPS = (
+    _enum_columns_to_codes,
+    _move_conversation_members,
+    _backfill_profile_completeness,
+    _drop_replaced_constraints,
+    _case_insensitive_emails,
+    _create_missing_indexes,
+)
+
+
+async def run_migrations(conn: AsyncConnection) -> None:
+    for step in _STEPS:
+        await step(conn)
@@ -0,0 +1,48 @@
+"""
+Custom column types.
+"""
+import enum
+from typing import Optional, Type
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+
+def enum_code(member: enum.Enum) -> int:
+    """The SMALLINT code IntEnumType stores for `member`, e.g. for index predicates."""
+    return tuple(type(member)).index(member) + 1
+
+
+class IntEnumType(TypeDecorator):
+    """
+    Store a Python enum as a SMALLINT code instead of a VARCHAR/native enum.
+    
+    The code is the member's 1-based position in the enum definition, so members
+    must only ever be appended - never reordered or removed. The API keeps using
+    the string ``.value`` of each member; only the storage format changes.
+    """
+    impl = SmallInteger
+    cache_ok = True
+    
+    def __init__(self, enum_class: Type[enum.Enum], *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._enum_class = enum_class
+        self._members = tuple(enum_class)
+        self._codes = {member: enum_code(member) for member in self._members}
+    
+    @property
+    def enum_class(self) -> Type[enum.Enum]:
+        return self._enum_class
+    
+    def process_bind_param(self, value, dialect) -> Optional[int]:
+        if value is None:
+            return None
+        if not isinstance(value, self._enum_class):
+            value = self._enum_class(value)
+        return self._codes[value]
+    
+    def process_result_value(self, value, dialect) -> Optional[enum.Enum]:
+        if value is None:
+            return None
+        if not 1 <= value <= len(self._members):
+            raise ValueError(f"{value!r} is not a stored code of {self._enum_class.__name__}")
+        return self._members[value - 1]
@@ -1,14 +1,29 @@
-from contextlib import asynccontextmanager
+"""
+Collabers API application.
+
+Production command (uvloop and httptools ship with uvicorn[standard]; pinning
+them avoids a silent fallback to the asyncio loop and h11 parser):
+
+    uvicorn app.main:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools
+
+Worker count follows WEB_CONCURRENCY, which uvicorn reads as --workers; more
+than one requires REDIS_URL (see app.core.config).
+"""
+import asyncio
+from contextlib import asynccontextmanager, suppress
 import logging
+from anyio import to_thread
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from starlette.middleware.base import BaseHTTPMiddleware
-from app.db.database import create_tables
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy import text
+from app.db.database import engine
 from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.redis_client import close_redis
 from app.routers import (
     auth_router,
     profile_router,
@@ -19,6 +34,10 @@ from app.routers import (
     notifications_router,
     reports_router,
 )
+from app.routers.notifications import UNREAD_COUNT_HEADER
+from app.routers.profile import UPLOAD_DIR as AVATAR_DIR
+from app.services import flush_project_views
+from app.services.email_service import close_smtp_pool
 
 # Configure logging
 logging.basicConfig(
@@ -27,28 +46,59 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Add security headers to all responses."""
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        if settings.PRODUCTION:
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        return response
+class SecurityHeadersMiddleware:
+    """Add security headers to all responses (raw ASGI, no BaseHTTPMiddleware overhead)."""
+    HEADERS = [
+        (b"x-content-type-options", b"nosniff"),
+        (b"x-frame-options", b"DENY"),
+        (b"x-xss-protection", b"1; mode=block"),
+        (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    ]
+    if settings.PRODUCTION:
+        HEADERS.append((b"strict-transport-security", b"max-age=31536000; includeSubDomains"))
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", ())) + self.HEADERS
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
+
+
+async def flush_project_views_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.VIEW_FLUSH_INTERVAL)
+        try:
+            await flush_project_views()
+        except Exception:
+            logger.exception("Failed to flush project view counts")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info(f"Starting Collabers API (Production: {settings.PRODUCTION})")
-    await create_tables()
+    # Password hashing is offloaded to the thread pool; raise the default 40-token cap
+    to_thread.current_default_thread_limiter().total_tokens = 64
+    # Schema is created at deploy time (python -m app.db.init_db); just open
+    # one pooled connection so the first request doesn't pay for the connect.
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    view_flusher = asyncio.create_task(flush_project_views_periodically())
     yield
+    view_flusher.cancel()
+    with suppress(asyncio.CancelledError):
+        await view_flusher
+    await flush_project_views()
+    await close_smtp_pool()
+    await close_redis()
     logger.info("Shutting down Collabers API")
 
 
@@ -57,6 +107,7 @@ app = FastAPI(
     description="Find your project partner. Build something together.",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url=None if settings.PRODUCTION else "/docs",
     redoc_url=None if settings.PRODUCTION else "/redoc",
 )
@@ -64,10 +115,6 @@ app = FastAPI(
 # Add security headers middleware
 app.add_middleware(SecurityHeadersMiddleware)
 
-# Add rate limiter to app state
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # CORS configuration
 allowed_origins = [settings.FRONTEND_URL]
 if not settings.PRODUCTION:
@@ -79,8 +126,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
     allow_headers=["Authorization", "Content-Type"],
+    expose_headers=[NEXT_CURSOR_HEADER, UNREAD_COUNT_HEADER],
 )
 
+# Compress larger JSON payloads (project feeds, notifications, message history)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 app.include_router(auth_router, prefix="/api")
 app.include_router(profile_router, prefix="/api")
 app.include_router(projects_router, prefix="/api")
@@ -90,6 +141,9 @@ app.include_router(conversations_router, prefix="/api")
 app.include_router(notifications_router, prefix="/api")
 app.include_router(reports_router, prefix="/api")
 
+if settings.SERVE_AVATARS:
+    app.mount("/api/profile/avatars", StaticFiles(directory=AVATAR_DIR), name="avatars")
+
 
 @app.get("/")
 async def root():
@@ -5,7 +5,9 @@ from app.models.models import (
     Application,
     Collaboration,
     Conversation,
+    ConversationParticipant,
     Message,
+    MessageRead,
     Notification,
     Report,
     AccountStatus,
@@ -20,6 +22,8 @@ from app.models.models import (
     NotificationType,
     ReportReason,
     ReportStatus,
+    TEAM_CHAT_WHERE,
+    compute_profile_completeness,
 )
 from app.models.verification import (
     EmailVerification,
@@ -34,7 +38,9 @@ __all__ = [
     "Application",
     "Collaboration",
     "Conversation",
+    "ConversationParticipant",
     "Message",
+    "MessageRead",
     "Notification",
     "Report",
     "AccountStatus",
@@ -49,6 +55,8 @@ __all__ = [
     "NotificationType",
     "ReportReason",
     "ReportStatus",
+    "TEAM_CHAT_WHERE",
+    "compute_profile_completeness",
     "EmailVerification",
     "VerificationRateLimit",
     "VerificationType",
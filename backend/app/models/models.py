@@ -1,12 +1,13 @@
 import enum
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import FrozenSet, List, Optional
 from sqlalchemy import (
-    String, Text, Integer, Boolean, DateTime, ForeignKey, Enum as SQLEnum,
-    JSON, UniqueConstraint, Index
+    String, Text, Integer, Boolean, DateTime, ForeignKey,
+    JSON, UniqueConstraint, Index, PrimaryKeyConstraint, event, func, text
 )
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, query_expression, relationship
 from app.db.database import Base
+from app.db.types import IntEnumType, enum_code
 
 
 class AccountStatus(enum.Enum):
@@ -98,13 +99,14 @@ class User(Base):
     __tablename__ = "users"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
-    password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
+    email: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Deferred: only login reads it, and it stays out of the cached auth snapshot
+    password_hash: Mapped[str] = mapped_column(String(255), nullable=False, deferred=True)
     email_verified: Mapped[bool] = mapped_column(Boolean, default=False)
     token_version: Mapped[int] = mapped_column(Integer, default=0)  # Increment to invalidate all tokens
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     last_active: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
-    account_status: Mapped[AccountStatus] = mapped_column(SQLEnum(AccountStatus), default=AccountStatus.ACTIVE)
+    account_status: Mapped[AccountStatus] = mapped_column(IntEnumType(AccountStatus), default=AccountStatus.ACTIVE)
     
     profile: Mapped[Optional["Profile"]] = relationship("Profile", back_populates="user", uselist=False)
     projects: Mapped[List["ProjectPost"]] = relationship("ProjectPost", back_populates="creator")
@@ -113,6 +115,11 @@ class User(Base):
     notifications: Mapped[List["Notification"]] = relationship("Notification", back_populates="user")
     sent_messages: Mapped[List["Message"]] = relationship("Message", back_populates="sender")
     reports_filed: Mapped[List["Report"]] = relationship("Report", back_populates="reporter", foreign_keys="Report.reporter_id")
+    
+    __table_args__ = (
+        # Emails are stored lower-cased, unique and looked up case-insensitively
+        Index("ix_users_email_lower", func.lower(email), unique=True),
+    )
 
 
 class Profile(Base):
@@ -140,26 +147,38 @@ class Profile(Base):
     portfolio_url: Mapped[Optional[str]] = mapped_column(String(500))
     links: Mapped[Optional[dict]] = mapped_column(JSON, default=dict)  # Keep for backwards compat
     interests: Mapped[Optional[List[str]]] = mapped_column(JSON, default=list)
+    profile_completeness: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc)
+    )
     
     user: Mapped["User"] = relationship("User", back_populates="profile")
-    
-    @property
-    def profile_completeness(self) -> int:
-        fields = [
-            self.full_name or self.display_name,
-            self.skills and len(self.skills) > 0,
-            self.university,
-            self.major,
-            self.graduation_year,
-            self.bio,
-            self.tech_stack and len(self.tech_stack) > 0,
-            self.roles and len(self.roles) > 0,
-            self.availability,
-            self.hours_per_week,
-            self.github_url or self.linkedin_url or self.portfolio_url,
-        ]
-        filled = sum(1 for f in fields if f)
-        return int((filled / len(fields)) * 100)
+
+
+def compute_profile_completeness(profile: Profile) -> int:
+    fields = [
+        profile.full_name or profile.display_name,
+        profile.skills and len(profile.skills) > 0,
+        profile.university,
+        profile.major,
+        profile.graduation_year,
+        profile.bio,
+        profile.tech_stack and len(profile.tech_stack) > 0,
+        profile.roles and len(profile.roles) > 0,
+        profile.availability,
+        profile.hours_per_week,
+        profile.github_url or profile.linkedin_url or profile.portfolio_url,
+    ]
+    filled = sum(1 for f in fields if f)
+    return int((filled / len(fields)) * 100)
+
+
+@event.listens_for(Profile, "before_insert")
+@event.listens_for(Profile, "before_update")
+def _update_profile_completeness(mapper, connection, target: Profile) -> None:
+    target.profile_completeness = compute_profile_completeness(target)
 
 
 class ProjectPost(Base):
@@ -170,14 +189,14 @@ class ProjectPost(Base):
     title: Mapped[str] = mapped_column(String(100), nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=False)
     detailed_description: Mapped[Optional[str]] = mapped_column(Text)
-    category: Mapped[ProjectCategory] = mapped_column(SQLEnum(ProjectCategory), nullable=False)
+    category: Mapped[ProjectCategory] = mapped_column(IntEnumType(ProjectCategory), nullable=False)
     tech_stack: Mapped[Optional[List[str]]] = mapped_column(JSON, default=list)
     roles_needed: Mapped[List[str]] = mapped_column(JSON, nullable=False)
     commitment_hours: Mapped[str] = mapped_column(String(50), nullable=False)
-    duration: Mapped[ProjectDuration] = mapped_column(SQLEnum(ProjectDuration), nullable=False)
+    duration: Mapped[ProjectDuration] = mapped_column(IntEnumType(ProjectDuration), nullable=False)
     team_size: Mapped[int] = mapped_column(Integer, nullable=False)
-    status: Mapped[ProjectStatus] = mapped_column(SQLEnum(ProjectStatus), default=ProjectStatus.DRAFT)
-    visibility: Mapped[ProjectVisibility] = mapped_column(SQLEnum(ProjectVisibility), default=ProjectVisibility.PUBLIC)
+    status: Mapped[ProjectStatus] = mapped_column(IntEnumType(ProjectStatus), default=ProjectStatus.DRAFT)
+    visibility: Mapped[ProjectVisibility] = mapped_column(IntEnumType(ProjectVisibility), default=ProjectVisibility.PUBLIC)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     deadline: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     views_count: Mapped[int] = mapped_column(Integer, default=0)
@@ -188,10 +207,35 @@ class ProjectPost(Base):
     collaborations: Mapped[List["Collaboration"]] = relationship("Collaboration", back_populates="project")
     conversations: Mapped[List["Conversation"]] = relationship("Conversation", back_populates="project")
     
+    # Filled in by queries that select it (with_expression); None otherwise
+    application_count: Mapped[Optional[int]] = query_expression()
+    
     __table_args__ = (
         Index("ix_project_posts_status", "status"),
         Index("ix_project_posts_category", "category"),
+        Index("ix_project_posts_feed", "visibility", "status", "category", "created_at"),
+        # Trigram indexes let the feed's '%term%' ILIKE search skip the full scan
+        # (Postgres only; create_tables enables pg_trgm first)
+        Index(
+            "ix_project_posts_title_trgm", "title",
+            postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_project_posts_description_trgm", "description",
+            postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
     )
+    
+    @property
+    def roles_needed_set(self) -> FrozenSet[str]:
+        return frozenset(self.roles_needed or ())
+
+
+# Statuses that no longer count as an open application, as the stored codes
+_CLOSED_APPLICATION_CODES = ", ".join(
+    str(enum_code(status)) for status in (ApplicationStatus.REJECTED, ApplicationStatus.WITHDRAWN)
+)
+_OPEN_APPLICATION_WHERE = text(f"status NOT IN ({_CLOSED_APPLICATION_CODES})")
 
 
 class Application(Base):
@@ -202,7 +246,7 @@ class Application(Base):
     applicant_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
     proposed_role: Mapped[str] = mapped_column(String(50), nullable=False)
     cover_letter: Mapped[str] = mapped_column(Text, nullable=False)
-    status: Mapped[ApplicationStatus] = mapped_column(SQLEnum(ApplicationStatus), default=ApplicationStatus.PENDING)
+    status: Mapped[ApplicationStatus] = mapped_column(IntEnumType(ApplicationStatus), default=ApplicationStatus.PENDING)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     responded_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     
@@ -210,8 +254,16 @@ class Application(Base):
     applicant: Mapped["User"] = relationship("User", back_populates="applications")
     
     __table_args__ = (
-        UniqueConstraint("project_id", "applicant_id", name="uq_application_project_applicant"),
+        # One open application per applicant and project, enforced atomically.
+        # Rejected and withdrawn ones don't count, so the user can apply again.
+        Index(
+            "uq_applications_project_applicant_open", "project_id", "applicant_id",
+            unique=True,
+            postgresql_where=_OPEN_APPLICATION_WHERE,
+            sqlite_where=_OPEN_APPLICATION_WHERE,
+        ),
         Index("ix_applications_status", "status"),
+        Index("ix_applications_project_status", "project_id", "status"),
     )
 
 
@@ -222,7 +274,7 @@ class Collaboration(Base):
     project_id: Mapped[int] = mapped_column(Integer, ForeignKey("project_posts.id"), nullable=False)
     collaborator_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
     role: Mapped[str] = mapped_column(String(50), nullable=False)
-    status: Mapped[CollaborationStatus] = mapped_column(SQLEnum(CollaborationStatus), default=CollaborationStatus.ACTIVE)
+    status: Mapped[CollaborationStatus] = mapped_column(IntEnumType(CollaborationStatus), default=CollaborationStatus.ACTIVE)
     joined_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     ended_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     
@@ -234,18 +286,54 @@ class Collaboration(Base):
     )
 
 
+# Rows of the team chat type; the predicate of uq_conversations_project_team_chat,
+# which upserts must name to target that index
+TEAM_CHAT_WHERE = text(f"type = {enum_code(ConversationType.TEAM_CHAT)}")
+
+
 class Conversation(Base):
     __tablename__ = "conversations"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     project_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("project_posts.id"))
-    participant_ids: Mapped[List[int]] = mapped_column(JSON, nullable=False)
-    type: Mapped[ConversationType] = mapped_column(SQLEnum(ConversationType), nullable=False)
+    type: Mapped[ConversationType] = mapped_column(IntEnumType(ConversationType), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     last_message_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     
     project: Mapped[Optional["ProjectPost"]] = relationship("ProjectPost", back_populates="conversations")
     messages: Mapped[List["Message"]] = relationship("Message", back_populates="conversation")
+    participants: Mapped[List["ConversationParticipant"]] = relationship(
+        "ConversationParticipant", back_populates="conversation",
+        cascade="all, delete-orphan", lazy="selectin"
+    )
+    
+    @property
+    def participant_ids(self) -> List[int]:
+        return [p.user_id for p in self.participants]
+    
+    __table_args__ = (
+        # One team chat per project, so concurrent creations can't duplicate it
+        Index(
+            "uq_conversations_project_team_chat", "project_id",
+            unique=True,
+            postgresql_where=TEAM_CHAT_WHERE,
+            sqlite_where=TEAM_CHAT_WHERE,
+        ),
+    )
+
+
+class ConversationParticipant(Base):
+    __tablename__ = "conversation_participants"
+    
+    conversation_id: Mapped[int] = mapped_column(Integer, ForeignKey("conversations.id"), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    
+    conversation: Mapped["Conversation"] = relationship("Conversation", back_populates="participants")
+    
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "conversation_id"),
+        Index("ix_conversation_participants_conversation_user", "conversation_id", "user_id"),
+    )
 
 
 class Message(Base):
@@ -256,10 +344,35 @@ class Message(Base):
     sender_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
-    read_by: Mapped[List[int]] = mapped_column(JSON, default=list)
     
     conversation: Mapped["Conversation"] = relationship("Conversation", back_populates="messages")
     sender: Mapped["User"] = relationship("User", back_populates="sent_messages")
+    reads: Mapped[List["MessageRead"]] = relationship(
+        "MessageRead", back_populates="message",
+        cascade="all, delete-orphan", lazy="selectin"
+    )
+    
+    __table_args__ = (
+        Index("ix_messages_conversation_created_id", "conversation_id", "created_at", "id"),
+    )
+    
+    @property
+    def read_by(self) -> List[int]:
+        return [r.user_id for r in self.reads]
+
+
+class MessageRead(Base):
+    __tablename__ = "message_reads"
+    
+    message_id: Mapped[int] = mapped_column(Integer, ForeignKey("messages.id"), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    
+    message: Mapped["Message"] = relationship("Message", back_populates="reads")
+    
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "message_id"),
+        Index("ix_message_reads_message_user", "message_id", "user_id"),
+    )
 
 
 class Notification(Base):
@@ -267,7 +380,7 @@ class Notification(Base):
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
-    type: Mapped[NotificationType] = mapped_column(SQLEnum(NotificationType), nullable=False)
+    type: Mapped[NotificationType] = mapped_column(IntEnumType(NotificationType), nullable=False)
     reference_type: Mapped[str] = mapped_column(String(50), nullable=False)
     reference_id: Mapped[int] = mapped_column(Integer, nullable=False)
     read: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -277,7 +390,16 @@ class Notification(Base):
     user: Mapped["User"] = relationship("User", back_populates="notifications")
     
     __table_args__ = (
-        Index("ix_notifications_user_read", "user_id", "read"),
+        # Unread-only list; id completes the keyset ORDER BY so pages come straight off the index
+        Index("ix_notifications_user_read_created_id", "user_id", "read", "created_at", "id"),
+        # Default (all) list, newest first, matching the keyset ORDER BY
+        Index("ix_notifications_user_created_id", "user_id", "created_at", "id"),
+        # Badge count: only unread rows are indexed, so the count stays small
+        Index(
+            "ix_notifications_user_unread", "user_id",
+            postgresql_where=text("read = false"),
+            sqlite_where=text("read = 0"),
+        ),
     )
 
 
@@ -288,9 +410,9 @@ class Report(Base):
     reporter_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
     reported_user_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id"))
     reported_project_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("project_posts.id"))
-    reason: Mapped[ReportReason] = mapped_column(SQLEnum(ReportReason), nullable=False)
+    reason: Mapped[ReportReason] = mapped_column(IntEnumType(ReportReason), nullable=False)
     details: Mapped[Optional[str]] = mapped_column(Text)
-    status: Mapped[ReportStatus] = mapped_column(SQLEnum(ReportStatus), default=ReportStatus.PENDING)
+    status: Mapped[ReportStatus] = mapped_column(IntEnumType(ReportStatus), default=ReportStatus.PENDING)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     
     reporter: Mapped["User"] = relationship("User", back_populates="reports_filed", foreign_keys=[reporter_id])
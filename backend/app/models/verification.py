@@ -7,9 +7,10 @@ Both are single-use and auto-invalidated upon successful verification.
 import enum
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING
-from sqlalchemy import String, Integer, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Index
+from sqlalchemy import String, Integer, Boolean, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.database import Base
+from app.db.types import IntEnumType
 
 if TYPE_CHECKING:
     from app.models.models import User
@@ -38,7 +39,7 @@ class EmailVerification(Base):
     
     # Common fields
     verification_type: Mapped[VerificationType] = mapped_column(
-        SQLEnum(VerificationType), 
+        IntEnumType(VerificationType), 
         default=VerificationType.EMAIL_VERIFICATION
     )
     is_used: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -53,6 +54,12 @@ class EmailVerification(Base):
     # Indexes for efficient lookups
     __table_args__ = (
         Index('ix_email_verifications_user_id_type', 'user_id', 'verification_type'),
+        # Link verification looks rows up by token alone; used tokens are left out
+        Index(
+            'ix_email_verifications_active_token', 'link_token_hash',
+            postgresql_where=text('is_used = false'),
+            sqlite_where=text('is_used = 0'),
+        ),
     )
 
 
@@ -0,0 +1,128 @@
+"""
+Response builders shared by several routers.
+"""
+from operator import attrgetter
+from typing import Dict, Iterable, Optional
+from app.core.cache import (
+    cache, get_or_build_models, profile_cache_key, user_profile_key,
+    PROFILE_RESPONSE_TTL, USER_PROFILE_TTL
+)
+from app.schemas import ProfileResponse
+from app.services import fetch_profile_by_user_id, get_profiles_by_user_ids
+
+
+# ProjectResponse fields copied from a ProjectPost as they are; one C-level
+# attrgetter call reads them all, and another the four enum string values
+_PROJECT_COLUMNS = (
+    "id", "creator_id", "title", "description", "detailed_description", "commitment_hours",
+    "team_size", "created_at", "deadline", "views_count", "project_links",
+)
+_project_column_values = attrgetter(*_PROJECT_COLUMNS)
+_PROJECT_ENUMS = ("category", "duration", "status", "visibility")
+_project_enum_values = attrgetter(*(f"{name}.value" for name in _PROJECT_ENUMS))
+
+_profile_id = attrgetter("id")
+
+
+def project_fields(project) -> dict:
+    """The ProjectResponse fields of a ProjectPost, ready for model_construct."""
+    fields = dict(zip(_PROJECT_COLUMNS, _project_column_values(project)))
+    fields.update(zip(_PROJECT_ENUMS, _project_enum_values(project)))
+    fields["tech_stack"] = project.tech_stack or []
+    fields["roles_needed"] = project.roles_needed or []
+    return fields
+
+
+def build_profile_response(profile, prebuilt: Optional[Dict[int, ProfileResponse]] = None) -> ProfileResponse:
+    if not profile:
+        return None
+    if prebuilt and profile.id in prebuilt:
+        return prebuilt[profile.id]
+    return ProfileResponse.model_construct(
+        id=profile.id,
+        user_id=profile.user_id,
+        full_name=profile.full_name,
+        display_name=profile.display_name,
+        headline=profile.headline,
+        avatar_url=profile.avatar_url,
+        university=profile.university,
+        major=profile.major,
+        graduation_year=profile.graduation_year,
+        bio=profile.bio,
+        skills=profile.skills or [],
+        tech_stack=profile.tech_stack or [],
+        roles=profile.roles or [],
+        preferred_roles=profile.preferred_roles or [],
+        availability=profile.availability,
+        hours_per_week=profile.hours_per_week,
+        timezone=profile.timezone,
+        github_url=profile.github_url,
+        linkedin_url=profile.linkedin_url,
+        portfolio_url=profile.portfolio_url,
+        links=profile.links or {},
+        interests=profile.interests or [],
+        profile_completeness=profile.profile_completeness
+    )
+
+
+def build_profile_responses(profiles: Iterable) -> Dict[int, ProfileResponse]:
+    """Build each distinct profile once, for responses that repeat the same people; {profile.id: response}."""
+    unique = {profile.id: profile for profile in profiles if profile}
+    return {profile_id: build_profile_response(profile) for profile_id, profile in unique.items()}
+
+
+async def load_profile_responses(profiles) -> Dict[int, ProfileResponse]:
+    """Build (or fetch from cache) the responses for a batch of profiles in one round-trip."""
+    return await get_or_build_models(
+        profiles, ProfileResponse, profile_cache_key, _profile_id,
+        build_profile_response, PROFILE_RESPONSE_TTL
+    )
+
+
+async def get_user_profile_response(user_id: int) -> Optional[ProfileResponse]:
+    """A user's ProfileResponse from the cache; the profile is only read (on its own session) on a miss."""
+    key = user_profile_key(user_id)
+    cached = await cache.get(key)
+    if cached is not None:
+        return ProfileResponse.model_validate_json(cached) if cache.shared else cached
+    
+    profile = await fetch_profile_by_user_id(user_id)
+    if not profile:
+        return None
+    response = build_profile_response(profile)
+    await cache.set(key, response.model_dump_json() if cache.shared else response, USER_PROFILE_TTL)
+    return response
+
+
+async def get_user_profile_responses(db, user_ids: Iterable[int]) -> Dict[int, ProfileResponse]:
+    """
+    get_user_profile_response for many users: one cache round-trip, then one
+    IN query for the misses. Users without a profile are left out.
+    """
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return {}
+    
+    cached = await cache.get_many([user_profile_key(uid) for uid in user_ids])
+    responses: Dict[int, ProfileResponse] = {}
+    missing = []
+    for uid, value in zip(user_ids, cached):
+        if value is None:
+            missing.append(uid)
+        else:
+            responses[uid] = ProfileResponse.model_validate_json(value) if cache.shared else value
+    
+    if missing:
+        built = {
+            uid: build_profile_response(profile)
+            for uid, profile in (await get_profiles_by_user_ids(db, missing)).items()
+        }
+        responses.update(built)
+        await cache.set_many(
+            {
+                user_profile_key(uid): response.model_dump_json() if cache.shared else response
+                for uid, response in built.items()
+            },
+            USER_PROFILE_TTL
+        )
+    return responses
@@ -1,84 +1,81 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, status
+from typing import Dict, List, Optional
+import orjson
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from app.core.cache import (
+    cache, bump_project_feed, my_applications_key, my_collaborations_key, project_response_key,
+    project_team_key, USER_LIST_TTL
+)
+from app.db.database import async_session_maker
+from app.routers._builders import (
+    build_profile_response, get_user_profile_response, load_profile_responses, project_fields
+)
 from app.routers.deps import DBSession, CurrentUser, VerifiedUser
 from app.schemas import (
     ApplicationCreate, ApplicationUpdate, ApplicationResponse,
     ProfileResponse, ProjectResponse, CollaborationResponse
 )
 from app.services import (
-    create_application, get_application_by_id, get_existing_application,
-    get_project_applications, get_user_applications, update_application_status,
-    mark_application_viewed, get_project_by_id, get_profile_by_user_id,
+    create_application, get_application_by_id, get_project_and_existing_application,
+    get_project_applications, get_user_applications, stream_user_applications, update_application_status,
+    mark_application_viewed, get_project_row,
     check_profile_can_post, create_collaboration, get_or_create_team_conversation,
-    add_participant_to_conversation, create_notification
+    add_participant_to_conversation, send_notification, get_profiles_by_user_ids
 )
-from app.models import NotificationType
+from app.models import ApplicationStatus, NotificationType, Profile, ProjectStatus
 
 router = APIRouter(prefix="/applications", tags=["Applications"])
 
+_UNPROCESSED = frozenset({ApplicationStatus.PENDING, ApplicationStatus.VIEWED})
+_ACCEPTING_APPLICATIONS = frozenset({ProjectStatus.OPEN, ProjectStatus.IN_PROGRESS})
 
-def build_profile_response(profile) -> ProfileResponse:
-    if not profile:
-        return None
-    return ProfileResponse(
-        id=profile.id,
-        user_id=profile.user_id,
-        full_name=profile.full_name,
-        display_name=profile.display_name,
-        headline=profile.headline,
-        avatar_url=profile.avatar_url,
-        university=profile.university,
-        major=profile.major,
-        graduation_year=profile.graduation_year,
-        bio=profile.bio,
-        skills=profile.skills or [],
-        tech_stack=profile.tech_stack or [],
-        roles=profile.roles or [],
-        preferred_roles=profile.preferred_roles or [],
-        availability=profile.availability,
-        hours_per_week=profile.hours_per_week,
-        timezone=profile.timezone,
-        github_url=profile.github_url,
-        linkedin_url=profile.linkedin_url,
-        portfolio_url=profile.portfolio_url,
-        links=profile.links or {},
-        interests=profile.interests or [],
-        profile_completeness=profile.profile_completeness
-    )
+# status -> (made by the applicant?, statuses it may move from, 403 detail, 400 detail)
+_TRANSITIONS = {
+    "withdrawn": (
+        True, _UNPROCESSED,
+        "Only the applicant can withdraw an application",
+        "Cannot withdraw an application that has already been processed",
+    ),
+    "accepted": (
+        False, _UNPROCESSED,
+        "Only the project creator can accept or reject applications",
+        "This application has already been processed",
+    ),
+    "rejected": (
+        False, _UNPROCESSED,
+        "Only the project creator can accept or reject applications",
+        "This application has already been processed",
+    ),
+}
 
 
-def build_application_response(application, include_project: bool = False) -> ApplicationResponse:
-    applicant_profile = None
-    if application.applicant and application.applicant.profile:
-        applicant_profile = build_profile_response(application.applicant.profile)
+def build_application_response(
+    application,
+    include_project: bool = False,
+    profiles: Optional[Dict[int, ProfileResponse]] = None,
+    applicant_profiles: Optional[Dict[int, Profile]] = None
+) -> ApplicationResponse:
+    """
+    `applicant_profiles` ({user_id: Profile}) replaces the application.applicant
+    relationship for lists loaded without it.
+    """
+    if applicant_profiles is not None:
+        profile = applicant_profiles.get(application.applicant_id)
+    else:
+        profile = application.applicant.profile if application.applicant else None
+    applicant_profile = build_profile_response(profile, profiles) if profile else None
     
     project = None
     if include_project and application.project:
         creator_profile = None
         if application.project.creator and application.project.creator.profile:
-            creator_profile = build_profile_response(application.project.creator.profile)
-        project = ProjectResponse(
-            id=application.project.id,
-            creator_id=application.project.creator_id,
-            title=application.project.title,
-            description=application.project.description,
-            detailed_description=application.project.detailed_description,
-            category=application.project.category.value,
-            tech_stack=application.project.tech_stack or [],
-            roles_needed=application.project.roles_needed or [],
-            commitment_hours=application.project.commitment_hours,
-            duration=application.project.duration.value,
-            team_size=application.project.team_size,
-            status=application.project.status.value,
-            visibility=application.project.visibility.value,
-            created_at=application.project.created_at,
-            deadline=application.project.deadline,
-            views_count=application.project.views_count,
-            project_links=application.project.project_links,
+            creator_profile = build_profile_response(application.project.creator.profile, profiles)
+        project = ProjectResponse.model_construct(
+            **project_fields(application.project),
             creator_profile=creator_profile
         )
     
-    return ApplicationResponse(
+    return ApplicationResponse.model_construct(
         id=application.id,
         project_id=application.project_id,
         applicant_id=application.applicant_id,
@@ -92,23 +89,36 @@ def build_application_response(application, include_project: bool = False) -> Ap
     )
 
 
+async def _load_my_application_profiles(applications) -> Dict[int, ProfileResponse]:
+    return await load_profile_responses(
+        [app.applicant.profile for app in applications if app.applicant]
+        + [app.project.creator.profile for app in applications if app.project and app.project.creator]
+    )
+
+
 @router.post("", response_model=ApplicationResponse, status_code=status.HTTP_201_CREATED)
-async def apply_to_project(data: ApplicationCreate, current_user: VerifiedUser, db: DBSession):
-    profile = await get_profile_by_user_id(db, current_user.id)
+async def apply_to_project(
+    data: ApplicationCreate,
+    current_user: VerifiedUser,
+    db: DBSession,
+    background_tasks: BackgroundTasks
+):
+    # Usually a cache hit; profile writes drop the entry
+    profile = await get_user_profile_response(current_user.id)
     if not check_profile_can_post(profile):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Please complete your profile before applying to projects"
         )
     
-    project = await get_project_by_id(db, data.project_id)
+    project, existing = await get_project_and_existing_application(db, data.project_id, current_user.id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
     
-    if project.status.value not in ["open", "in_progress"]:
+    if project.status not in _ACCEPTING_APPLICATIONS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This project is not accepting applications"
@@ -120,14 +130,13 @@ async def apply_to_project(data: ApplicationCreate, current_user: VerifiedUser,
             detail="You cannot apply to your own project"
         )
     
-    existing = await get_existing_application(db, data.project_id, current_user.id)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You have already applied to this project"
         )
     
-    if data.proposed_role not in project.roles_needed:
+    if data.proposed_role not in project.roles_needed_set:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid role. Available roles: {', '.join(project.roles_needed)}"
@@ -140,9 +149,14 @@ async def apply_to_project(data: ApplicationCreate, current_user: VerifiedUser,
         data.proposed_role,
         data.cover_letter
     )
+    if application is None:  # lost a race with a concurrent apply
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You have already applied to this project"
+        )
     
-    await create_notification(
-        db,
+    background_tasks.add_task(
+        send_notification,
         project.creator_id,
         NotificationType.NEW_APPLICATION,
         "application",
@@ -150,23 +164,59 @@ async def apply_to_project(data: ApplicationCreate, current_user: VerifiedUser,
         f"New application from {profile.full_name or profile.display_name} for {project.title}"
     )
     
-    application = await get_application_by_id(db, application.id)
+    await cache.delete(my_applications_key(current_user.id), project_response_key(project.id))
+    await bump_project_feed()  # application_count changed
     return build_application_response(application, include_project=True)
 
 
-@router.get("/my", response_model=List[ApplicationResponse])
+@router.get("/my", response_class=ORJSONResponse, responses={200: {"model": List[ApplicationResponse]}})
 async def get_my_applications(current_user: CurrentUser, db: DBSession):
+    cache_key = my_applications_key(current_user.id)
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        return Response(cached, media_type="application/json")
+    
     applications = await get_user_applications(db, current_user.id)
-    return [build_application_response(app, include_project=True) for app in applications]
+    profiles = await _load_my_application_profiles(applications)
+    response = ORJSONResponse([
+        build_application_response(app, include_project=True, profiles=profiles).model_dump(mode="json")
+        for app in applications
+    ])
+    await cache.set(cache_key, response.body, USER_LIST_TTL)
+    return response
 
 
-@router.get("/project/{project_id}", response_model=List[ApplicationResponse])
+@router.get("/my/stream", responses={200: {"content": {"application/x-ndjson": {}}}})
+async def stream_my_applications(current_user: CurrentUser):
+    """
+    Same rows as /my as newline-delimited JSON. Applications are read and sent
+    a batch at a time, so memory stays flat however long the list is. The
+    generator outlives the request's session, so it opens its own.
+    """
+    user_id = current_user.id
+    
+    async def rows():
+        async with async_session_maker() as db:
+            async for applications in stream_user_applications(db, user_id):
+                profiles = await _load_my_application_profiles(applications)
+                yield b"".join(
+                    orjson.dumps(
+                        build_application_response(app, include_project=True, profiles=profiles)
+                        .model_dump(mode="json")
+                    ) + b"\n"
+                    for app in applications
+                )
+    
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+@router.get("/project/{project_id}", response_class=ORJSONResponse, responses={200: {"model": List[ApplicationResponse]}})
 async def get_applications_for_project(
     project_id: int,
     current_user: CurrentUser,
     db: DBSession
 ):
-    project = await get_project_by_id(db, project_id)
+    project = await get_project_row(db, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -180,7 +230,14 @@ async def get_applications_for_project(
         )
     
     applications = await get_project_applications(db, project_id)
-    return [build_application_response(app) for app in applications]
+    applicant_profiles = await get_profiles_by_user_ids(db, (app.applicant_id for app in applications))
+    profiles = await load_profile_responses(applicant_profiles.values())
+    return ORJSONResponse([
+        build_application_response(
+            app, profiles=profiles, applicant_profiles=applicant_profiles
+        ).model_dump(mode="json")
+        for app in applications
+    ])
 
 
 @router.get("/{application_id}", response_model=ApplicationResponse)
@@ -201,9 +258,9 @@ async def get_application(application_id: int, current_user: CurrentUser, db: DB
             detail="You don't have access to this application"
         )
     
-    if is_creator and application.status.value == "pending":
+    if is_creator and application.status is ApplicationStatus.PENDING:
         await mark_application_viewed(db, application)
-        application = await get_application_by_id(db, application_id)
+        await cache.delete(my_applications_key(application.applicant_id))
     
     return build_application_response(application, include_project=True)
 
@@ -213,7 +270,8 @@ async def update_application(
     application_id: int,
     data: ApplicationUpdate,
     current_user: VerifiedUser,
-    db: DBSession
+    db: DBSession,
+    background_tasks: BackgroundTasks
 ):
     application = await get_application_by_id(db, application_id)
     if not application:
@@ -225,43 +283,29 @@ async def update_application(
     is_applicant = application.applicant_id == current_user.id
     is_creator = application.project.creator_id == current_user.id
     
-    if data.status == "withdrawn":
-        if not is_applicant:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Only the applicant can withdraw an application"
-            )
-        if application.status.value not in ["pending", "viewed"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot withdraw an application that has already been processed"
-            )
-    elif data.status in ["accepted", "rejected"]:
-        if not is_creator:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Only the project creator can accept or reject applications"
-            )
-        if application.status.value not in ["pending", "viewed"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="This application has already been processed"
-            )
-    else:
+    transition = _TRANSITIONS.get(data.status)
+    if transition is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid status update"
         )
     
+    by_applicant, allowed_from, role_error, status_error = transition
+    if not (is_applicant if by_applicant else is_creator):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=role_error)
+    if application.status not in allowed_from:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=status_error)
+    
     application = await update_application_status(
         db,
         application,
         data.status,
         is_creator=is_creator
     )
+    await cache.delete(my_applications_key(application.applicant_id))
     
     if data.status == "accepted":
-        collaboration = await create_collaboration(
+        await create_collaboration(
             db,
             application.project_id,
             application.applicant_id,
@@ -269,10 +313,15 @@ async def update_application(
         )
         
         conversation = await get_or_create_team_conversation(db, application.project_id)
-        await add_participant_to_conversation(db, conversation, application.applicant_id)
+        await add_participant_to_conversation(db, conversation.id, application.applicant_id)
+        await cache.delete(
+            my_collaborations_key(application.applicant_id),
+            project_team_key(application.project_id),
+            project_response_key(application.project_id)
+        )
         
-        await create_notification(
-            db,
+        background_tasks.add_task(
+            send_notification,
             application.applicant_id,
             NotificationType.APPLICATION_ACCEPTED,
             "application",
@@ -280,8 +329,8 @@ async def update_application(
             f"Your application to {application.project.title} has been accepted!"
         )
     elif data.status == "rejected":
-        await create_notification(
-            db,
+        background_tasks.add_task(
+            send_notification,
             application.applicant_id,
             NotificationType.APPLICATION_REJECTED,
             "application",
@@ -289,5 +338,4 @@ async def update_application(
             f"Your application to {application.project.title} was declined"
         )
     
-    application = await get_application_by_id(db, application_id)
     return build_application_response(application, include_project=True)
@@ -1,9 +1,9 @@
 """Authentication router."""
 import logging
 from typing import Optional
-from fastapi import APIRouter, HTTPException, status, Request, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Request, Query
 from fastapi.responses import RedirectResponse
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 
 from app.routers.deps import DBSession, CurrentUser
 from app.schemas import (
@@ -16,6 +16,7 @@ from app.services import (
 )
 from app.services.verification_service import (
     create_email_verification,
+    deliver_verification_email,
     verify_otp,
     verify_link_token,
     RateLimitExceeded,
@@ -32,6 +33,7 @@ from app.core.security import (
 )
 from app.core.verification_security import mask_email
 from app.core.config import settings
+from app.core.rate_limit import RateLimiter
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -39,9 +41,21 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 # ============== Schemas ==============
 
+def _check_otp(v: str) -> str:
+    """OTPs are exactly six ASCII digits."""
+    if len(v) != 6 or not (v.isascii() and v.isdigit()):
+        raise ValueError("OTP must be 6 digits")
+    return v
+
+
 class OTPVerifyRequest(BaseModel):
     """Request body for OTP verification."""
-    otp: str = Field(..., min_length=6, max_length=6, pattern=r"^\d{6}$")
+    otp: str = Field(..., min_length=6, max_length=6)
+
+    @field_validator("otp")
+    @classmethod
+    def validate_otp(cls, v: str) -> str:
+        return _check_otp(v)
 
 
 class RegisterResponse(BaseModel):
@@ -58,8 +72,18 @@ class RegisterResponse(BaseModel):
 
 # ============== Registration ==============
 
-@router.post("/register", response_model=RegisterResponse, status_code=status.HTTP_201_CREATED)
-async def register(request: Request, data: UserCreate, db: DBSession):
+@router.post(
+    "/register",
+    response_model=RegisterResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(RateLimiter(times=5, seconds=60))]
+)
+async def register(
+    request: Request,
+    data: UserCreate,
+    db: DBSession,
+    background_tasks: BackgroundTasks
+):
     """Register a new user and send verification email."""
     existing_user = await get_user_by_email(db, data.email)
     if existing_user:
@@ -72,11 +96,12 @@ async def register(request: Request, data: UserCreate, db: DBSession):
     
     # Create verification and send email
     try:
-        otp, link_token = await create_email_verification(
+        otp, link_token, email = await create_email_verification(
             db, user, VerificationType.EMAIL_VERIFICATION
         )
     except RateLimitExceeded as e:
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    background_tasks.add_task(deliver_verification_email, email)
     
     access_token = create_access_token(data={"sub": str(user.id)}, token_version=user.token_version)
     refresh_token = create_refresh_token(data={"sub": str(user.id)}, token_version=user.token_version)
@@ -101,7 +126,7 @@ async def register(request: Request, data: UserCreate, db: DBSession):
 
 # ============== Login ==============
 
-@router.post("/login", response_model=TokenPair)
+@router.post("/login", response_model=TokenPair, dependencies=[Depends(RateLimiter(times=10, seconds=60))])
 async def login(request: Request, data: UserLogin, db: DBSession):
     """Login with email and password."""
     user = await authenticate_user(db, data.email, data.password)
@@ -163,7 +188,11 @@ async def get_current_user_info(current_user: CurrentUser):
 # ============== Resend Verification ==============
 
 @router.post("/resend-verification")
-async def resend_verification(current_user: CurrentUser, db: DBSession):
+async def resend_verification(
+    current_user: CurrentUser,
+    db: DBSession,
+    background_tasks: BackgroundTasks
+):
     """Resend verification email."""
     if current_user.email_verified:
         raise HTTPException(
@@ -172,11 +201,12 @@ async def resend_verification(current_user: CurrentUser, db: DBSession):
         )
     
     try:
-        otp, link_token = await create_email_verification(
+        otp, link_token, email = await create_email_verification(
             db, current_user, VerificationType.EMAIL_VERIFICATION
         )
     except RateLimitExceeded as e:
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    background_tasks.add_task(deliver_verification_email, email)
     
     logger.info(f"Verification resent to: {mask_email(current_user.email)}")
     
@@ -248,16 +278,22 @@ async def verify_link_endpoint(
 
 # ============== Password Reset Request ==============
 
-@router.post("/request-password-reset")
-async def request_password_reset(request: Request, data: PasswordResetRequest, db: DBSession):
+@router.post("/request-password-reset", dependencies=[Depends(RateLimiter(times=5, seconds=60))])
+async def request_password_reset(
+    request: Request,
+    data: PasswordResetRequest,
+    db: DBSession,
+    background_tasks: BackgroundTasks
+):
     """Request password reset email."""
     user = await get_user_by_email(db, data.email)
     
     if user:
         try:
-            otp, link_token = await create_email_verification(
+            otp, link_token, email = await create_email_verification(
                 db, user, VerificationType.PASSWORD_RESET
             )
+            background_tasks.add_task(deliver_verification_email, email)
             
             response = {
                 "message": "If an account exists with this email, a password reset link has been sent."
@@ -282,9 +318,14 @@ async def request_password_reset(request: Request, data: PasswordResetRequest, d
 class PasswordResetOTPRequest(BaseModel):
     """Request body for password reset via OTP."""
     email: EmailStr
-    otp: str = Field(..., min_length=6, max_length=6, pattern=r"^\d{6}$")
+    otp: str = Field(..., min_length=6, max_length=6)
     new_password: str = Field(..., min_length=8)
 
+    @field_validator("otp")
+    @classmethod
+    def validate_otp(cls, v: str) -> str:
+        return _check_otp(v)
+
 
 @router.post("/reset-password-otp")
 async def reset_password_otp(data: PasswordResetOTPRequest, db: DBSession):
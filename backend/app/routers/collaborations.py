@@ -1,52 +1,32 @@
-from typing import List
+from typing import Dict, List, Optional
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import ORJSONResponse, Response
+from app.core.cache import (
+    cache, my_collaborations_key, project_response_key, project_team_key,
+    USER_LIST_TTL, PROJECT_TEAM_TTL
+)
+from app.routers._builders import build_profile_response, load_profile_responses
 from app.routers.deps import DBSession, CurrentUser, VerifiedUser
 from app.schemas import CollaborationResponse, ProfileResponse, ProjectResponse
 from app.services import (
     get_collaboration, get_user_collaborations, get_project_collaborations,
-    leave_collaboration, remove_collaborator, get_project_by_id,
+    leave_collaboration, remove_collaborator, get_project_row,
     remove_participant_from_conversation, get_or_create_team_conversation
 )
 
 router = APIRouter(prefix="/collaborations", tags=["Collaborations"])
 
 
-def build_profile_response(profile) -> ProfileResponse:
-    if not profile:
-        return None
-    return ProfileResponse(
-        id=profile.id,
-        user_id=profile.user_id,
-        full_name=profile.full_name,
-        display_name=profile.display_name,
-        headline=profile.headline,
-        avatar_url=profile.avatar_url,
-        university=profile.university,
-        major=profile.major,
-        graduation_year=profile.graduation_year,
-        bio=profile.bio,
-        skills=profile.skills or [],
-        tech_stack=profile.tech_stack or [],
-        roles=profile.roles or [],
-        preferred_roles=profile.preferred_roles or [],
-        availability=profile.availability,
-        hours_per_week=profile.hours_per_week,
-        timezone=profile.timezone,
-        github_url=profile.github_url,
-        linkedin_url=profile.linkedin_url,
-        portfolio_url=profile.portfolio_url,
-        links=profile.links or {},
-        interests=profile.interests or [],
-        profile_completeness=profile.profile_completeness
-    )
-
-
-def build_collaboration_response(collaboration, include_project: bool = False) -> CollaborationResponse:
+def build_collaboration_response(
+    collaboration,
+    include_project: bool = False,
+    profiles: Optional[Dict[int, ProfileResponse]] = None
+) -> CollaborationResponse:
     collab_profile = None
     if collaboration.collaborator and collaboration.collaborator.profile:
-        collab_profile = build_profile_response(collaboration.collaborator.profile)
+        collab_profile = build_profile_response(collaboration.collaborator.profile, profiles)
     
-    return CollaborationResponse(
+    return CollaborationResponse.model_construct(
         id=collaboration.id,
         project_id=collaboration.project_id,
         collaborator_id=collaboration.collaborator_id,
@@ -58,15 +38,31 @@ def build_collaboration_response(collaboration, include_project: bool = False) -
     )
 
 
-@router.get("/my", response_model=List[CollaborationResponse])
+@router.get("/my", response_class=ORJSONResponse, responses={200: {"model": List[CollaborationResponse]}})
 async def get_my_collaborations(current_user: CurrentUser, db: DBSession):
+    cache_key = my_collaborations_key(current_user.id)
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        return Response(cached, media_type="application/json")
+    
     collaborations = await get_user_collaborations(db, current_user.id)
-    return [build_collaboration_response(c) for c in collaborations]
+    profiles = await load_profile_responses([c.collaborator.profile for c in collaborations if c.collaborator])
+    response = ORJSONResponse([
+        build_collaboration_response(c, profiles=profiles).model_dump(mode="json")
+        for c in collaborations
+    ])
+    await cache.set(cache_key, response.body, USER_LIST_TTL)
+    return response
 
 
-@router.get("/project/{project_id}", response_model=List[CollaborationResponse])
+@router.get("/project/{project_id}", response_class=ORJSONResponse, responses={200: {"model": List[CollaborationResponse]}})
 async def get_project_team(project_id: int, db: DBSession):
-    project = await get_project_by_id(db, project_id)
+    cache_key = project_team_key(project_id)
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        return Response(cached, media_type="application/json")
+    
+    project = await get_project_row(db, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -74,7 +70,13 @@ async def get_project_team(project_id: int, db: DBSession):
         )
     
     collaborations = await get_project_collaborations(db, project_id)
-    return [build_collaboration_response(c) for c in collaborations]
+    profiles = await load_profile_responses([c.collaborator.profile for c in collaborations if c.collaborator])
+    response = ORJSONResponse([
+        build_collaboration_response(c, profiles=profiles).model_dump(mode="json")
+        for c in collaborations
+    ])
+    await cache.set(cache_key, response.body, PROJECT_TEAM_TTL)
+    return response
 
 
 @router.post("/{project_id}/leave", status_code=status.HTTP_200_OK)
@@ -86,7 +88,7 @@ async def leave_project(project_id: int, current_user: CurrentUser, db: DBSessio
             detail="You are not a collaborator on this project"
         )
     
-    project = await get_project_by_id(db, project_id)
+    project = await get_project_row(db, project_id)
     if project.creator_id == current_user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -94,9 +96,12 @@ async def leave_project(project_id: int, current_user: CurrentUser, db: DBSessio
         )
     
     await leave_collaboration(db, collaboration)
+    await cache.delete(
+        my_collaborations_key(current_user.id), project_team_key(project_id), project_response_key(project_id)
+    )
     
     conversation = await get_or_create_team_conversation(db, project_id)
-    await remove_participant_from_conversation(db, conversation, current_user.id)
+    await remove_participant_from_conversation(db, conversation.id, current_user.id)
     
     return {"message": "You have left the project"}
 
@@ -108,7 +113,7 @@ async def remove_team_member(
     current_user: VerifiedUser,
     db: DBSession
 ):
-    project = await get_project_by_id(db, project_id)
+    project = await get_project_row(db, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -135,8 +140,11 @@ async def remove_team_member(
         )
     
     await remove_collaborator(db, collaboration)
+    await cache.delete(
+        my_collaborations_key(user_id), project_team_key(project_id), project_response_key(project_id)
+    )
     
     conversation = await get_or_create_team_conversation(db, project_id)
-    await remove_participant_from_conversation(db, conversation, user_id)
+    await remove_participant_from_conversation(db, conversation.id, user_id)
     
     return {"message": "Team member removed"}
@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database import get_db
 from app.core.security import decode_token
 from app.models import User, AccountStatus
-from app.services import get_user_by_id, update_last_active
+from app.services import get_authenticated_user, update_last_active
 
 security = HTTPBearer()
 optional_security = HTTPBearer(auto_error=False)
@@ -37,7 +37,7 @@ async def get_current_user(
             detail="Invalid token payload"
         )
     
-    user = await get_user_by_id(db, int(user_id))
+    user = await get_authenticated_user(db, int(user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -90,7 +90,7 @@ async def get_optional_current_user(
     if not user_id:
         return None
     
-    user = await get_user_by_id(db, int(user_id))
+    user = await get_authenticated_user(db, int(user_id))
     if not user or user.account_status != AccountStatus.ACTIVE:
         return None
     
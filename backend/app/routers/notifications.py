@@ -1,5 +1,8 @@
-from typing import List
+from types import MappingProxyType
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException, status, Query
+from fastapi.responses import ORJSONResponse
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
 from app.routers.deps import DBSession, CurrentUser
 from app.schemas import NotificationResponse
 from app.services import (
@@ -9,20 +12,24 @@ from app.services import (
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
+UNREAD_COUNT_HEADER = "X-Unread-Count"
+
+
+_NOTIFICATION_TITLES = MappingProxyType({
+    "application_received": "New Application",
+    "application_accepted": "Application Accepted! 🎉",
+    "application_rejected": "Application Update",
+    "new_message": "New Message",
+    "project_update": "Project Updated",
+    "collaborator_joined": "New Team Member",
+    "collaborator_left": "Team Update",
+    "system": "System Notification",
+})
+
 
 def get_notification_title(notification_type: str) -> str:
     """Generate a user-friendly title based on notification type."""
-    titles = {
-        "application_received": "New Application",
-        "application_accepted": "Application Accepted! 🎉",
-        "application_rejected": "Application Update",
-        "new_message": "New Message",
-        "project_update": "Project Updated",
-        "collaborator_joined": "New Team Member",
-        "collaborator_left": "Team Update",
-        "system": "System Notification",
-    }
-    return titles.get(notification_type, "Notification")
+    return _NOTIFICATION_TITLES.get(notification_type, "Notification")
 
 
 def build_notification_response(n) -> NotificationResponse:
@@ -48,16 +55,32 @@ def build_notification_response(n) -> NotificationResponse:
     )
 
 
-@router.get("", response_model=List[NotificationResponse])
+@router.get("", response_class=ORJSONResponse, responses={200: {"model": List[NotificationResponse]}})
 async def get_notifications(
     current_user: CurrentUser,
     db: DBSession,
     unread_only: bool = Query(False),
     skip: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=100)
+    limit: int = Query(50, ge=1, le=100),
+    before: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    include_count: bool = Query(False, description="Also return the unread total in the X-Unread-Count header")
 ):
-    notifications = await get_user_notifications(db, current_user.id, unread_only, skip, limit)
-    return [build_notification_response(n) for n in notifications]
+    cursor = None
+    if before:
+        try:
+            cursor = decode_cursor(before)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    
+    notifications = await get_user_notifications(db, current_user.id, unread_only, skip, limit, cursor)
+    response = ORJSONResponse([build_notification_response(n).model_dump(mode="json") for n in notifications])
+    if len(notifications) == limit:
+        last = notifications[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    if include_count:
+        # Saves the badge a separate GET /notifications/count
+        response.headers[UNREAD_COUNT_HEADER] = str(await get_unread_notification_count(db, current_user.id))
+    return response
 
 
 @router.get("/count")
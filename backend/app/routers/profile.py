@@ -1,10 +1,21 @@
+import hashlib
+from itertools import islice
 import os
+import tempfile
+import time
 import uuid
+from typing import BinaryIO, Optional, Tuple
 from fastapi import APIRouter, HTTPException, status, UploadFile, File
-from fastapi.responses import FileResponse
+from PIL import Image, ImageOps, ImageSequence
+from starlette.concurrency import run_in_threadpool
+from app.db.database import async_session_maker
 from app.routers.deps import DBSession, CurrentUser, VerifiedUser
+from app.routers._builders import get_user_profile_response
 from app.schemas import ProfileCreate, ProfileUpdate, ProfileResponse
-from app.services import get_profile_by_user_id, create_profile, update_profile
+from app.services import (
+    get_profile_by_user_id, create_profile, update_profile,
+    avatar_url_in_use, get_avatar_urls, replace_avatar_url
+)
 
 router = APIRouter(prefix="/profile", tags=["Profile"])
 
@@ -12,8 +23,17 @@ UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file
 UPLOAD_DIR = os.path.realpath(UPLOAD_DIR)  # Normalize for path traversal checks
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+ALLOWED_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".gif", ".webp"})
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+_CHUNK_SIZE = 64 * 1024
+AVATAR_MAX_SIDE = 512
+AVATAR_URL_PREFIX = "/api/profile/avatars/"
+_AVATAR_SUFFIX = f"-{AVATAR_MAX_SIDE}.webp"
+_ORPHAN_GRACE = 3600
+# Animated uploads past either limit keep only their first frame, so a small
+# file can't make a worker decode and resize hundreds of full-size frames
+AVATAR_MAX_FRAMES = 100
+AVATAR_MAX_ANIMATION_PIXELS = 40_000_000  # source width x height x frames
 
 # Magic bytes for image validation
 IMAGE_SIGNATURES = {
@@ -25,51 +45,160 @@ IMAGE_SIGNATURES = {
 }
 
 
+_SIGNATURES = tuple(IMAGE_SIGNATURES)
+_SIGNATURE_LENGTHS = sorted({len(signature) for signature in IMAGE_SIGNATURES})
+_MAGIC_BYTES_LEN = 12  # enough for every signature plus the WebP marker at offset 8
+
+
 def detect_image_type(content: bytes) -> str | None:
     """Detect image type by checking magic bytes."""
-    for signature, img_type in IMAGE_SIGNATURES.items():
-        if content.startswith(signature):
+    # One C-level prefix test rejects anything that is not an image
+    if not content.startswith(_SIGNATURES):
+        return None
+    # WebP has RIFF at start, then WEBP at offset 8 (other RIFF files are not images)
+    if content[:4] == b'RIFF':
+        return 'webp' if content[8:12] == b'WEBP' else None
+    for length in _SIGNATURE_LENGTHS:
+        img_type = IMAGE_SIGNATURES.get(content[:length])
+        if img_type:
             return img_type
-    # WebP has RIFF at start, then WEBP at offset 8
-    if content[:4] == b'RIFF' and content[8:12] == b'WEBP':
-        return 'webp'
     return None
 
 
+def _receive_upload(src: BinaryIO) -> Optional[Tuple[str, str]]:
+    """
+    Copy an upload in chunks to a private temp file (outside UPLOAD_DIR, so it is
+    never served), hashing as it goes. Returns (path, content digest), or None
+    (keeping nothing) once it exceeds MAX_FILE_SIZE. Blocking; run it in a
+    worker thread.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(suffix=".upload")
+    with os.fdopen(fd, "wb") as out:
+        while chunk := src.read(_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    if size > MAX_FILE_SIZE:
+        os.remove(tmp_path)
+        return None
+    return tmp_path, digest.hexdigest()
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fit_frame(frame: Image.Image) -> Image.Image:
+    # exif_transpose applies the orientation to a copy before the EXIF block is dropped
+    frame = ImageOps.exif_transpose(frame)
+    frame.thumbnail((AVATAR_MAX_SIDE, AVATAR_MAX_SIDE))
+    return frame if frame.mode == "RGB" else frame.convert("RGBA")
+
+
+def _transcode_avatar(src_path: str, digest: str) -> Optional[str]:
+    """
+    Decode an image, shrink it to AVATAR_MAX_SIDE and re-encode it as WebP
+    (animated when the source is) into UPLOAD_DIR, named by the source's content
+    digest so identical uploads share one file. Only this output is ever served;
+    none of the source's metadata (EXIF, GPS, comments) is written to it.
+    Returns the filename, or None if the image does not decode. Blocking; run
+    it in a worker thread.
+    """
+    out_name = f"{digest}{_AVATAR_SUFFIX}"
+    out_path = os.path.join(UPLOAD_DIR, out_name)
+    if os.path.exists(out_path):
+        return out_name
+
+    tmp_path = os.path.join(UPLOAD_DIR, f".{uuid.uuid4().hex}.part")
+    try:
+        with Image.open(src_path) as img:
+            # n_frames only walks the frame headers; nothing is decoded yet
+            n_frames = getattr(img, "n_frames", 1)
+            width, height = img.size
+            if n_frames > AVATAR_MAX_FRAMES or width * height * n_frames > AVATAR_MAX_ANIMATION_PIXELS:
+                n_frames = 1
+            frames, durations = [], []
+            for frame in islice(ImageSequence.Iterator(img), n_frames):
+                durations.append(frame.info.get("duration", 100))
+                frames.append(_fit_frame(frame))
+            loop = img.info.get("loop", 0)
+        options = {"quality": 85, "method": 4}
+        if len(frames) > 1:
+            options.update(save_all=True, append_images=frames[1:], duration=durations, loop=loop)
+        frames[0].save(tmp_path, "WEBP", **options)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        _remove_quietly(tmp_path)
+        return None
+    os.replace(tmp_path, out_path)
+    return out_name
+
+
+def _avatar_file(avatar_url: str) -> Optional[str]:
+    """The file behind one of our avatar URLs, or None for anything else."""
+    if not avatar_url.startswith(AVATAR_URL_PREFIX):
+        return None
+    name = avatar_url[len(AVATAR_URL_PREFIX):]
+    if not name or name != os.path.basename(name) or name.startswith("."):
+        return None
+    return os.path.join(UPLOAD_DIR, name)
+
+
+async def _discard_avatar(db, avatar_url: str) -> None:
+    """Delete a replaced avatar's file unless another profile still shows it."""
+    path = _avatar_file(avatar_url)
+    if path is not None and not await avatar_url_in_use(db, avatar_url):
+        await run_in_threadpool(_remove_quietly, path)
+
+
+async def tidy_avatar_files() -> None:
+    """
+    Deploy-time cleanup (run by init_db). Avatars stored before uploads were
+    re-encoded on receipt still point at the original upload: re-encode those
+    and switch the profiles over. Then delete every file no profile shows, once
+    it is _ORPHAN_GRACE seconds old (uploads on running workers are spared).
+    """
+    async with async_session_maker() as db:
+        for url in await get_avatar_urls(db):
+            path = _avatar_file(url)
+            if path is None or url.endswith(_AVATAR_SUFFIX) or not os.path.exists(path):
+                continue
+            digest = await run_in_threadpool(_file_digest, path)
+            filename = await run_in_threadpool(_transcode_avatar, path, digest)
+            if filename is not None:
+                await replace_avatar_url(db, url, f"{AVATAR_URL_PREFIX}{filename}")
+        in_use = {os.path.basename(url) for url in await get_avatar_urls(db)}
+
+    cutoff = time.time() - _ORPHAN_GRACE
+    for entry in os.scandir(UPLOAD_DIR):
+        if entry.is_file() and entry.name not in in_use and entry.stat().st_mtime < cutoff:
+            _remove_quietly(entry.path)
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
 @router.get("/me", response_model=ProfileResponse)
-async def get_my_profile(current_user: CurrentUser, db: DBSession):
-    profile = await get_profile_by_user_id(db, current_user.id)
+async def get_my_profile(current_user: CurrentUser):
+    profile = await get_user_profile_response(current_user.id)
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Profile not found. Please create your profile first."
         )
     
-    return ProfileResponse(
-        id=profile.id,
-        user_id=profile.user_id,
-        full_name=profile.full_name,
-        display_name=profile.display_name,
-        headline=profile.headline,
-        avatar_url=profile.avatar_url,
-        university=profile.university,
-        major=profile.major,
-        graduation_year=profile.graduation_year,
-        bio=profile.bio,
-        skills=profile.skills or [],
-        tech_stack=profile.tech_stack or [],
-        roles=profile.roles or [],
-        preferred_roles=profile.preferred_roles or [],
-        availability=profile.availability,
-        hours_per_week=profile.hours_per_week,
-        timezone=profile.timezone,
-        github_url=profile.github_url,
-        linkedin_url=profile.linkedin_url,
-        portfolio_url=profile.portfolio_url,
-        links=profile.links or {},
-        interests=profile.interests or [],
-        profile_completeness=profile.profile_completeness
-    )
+    return profile
 
 
 @router.post("/me", response_model=ProfileResponse, status_code=status.HTTP_201_CREATED)
@@ -83,31 +212,7 @@ async def create_my_profile(data: ProfileCreate, current_user: CurrentUser, db:
     
     profile = await create_profile(db, current_user.id, data.model_dump())
     
-    return ProfileResponse(
-        id=profile.id,
-        user_id=profile.user_id,
-        full_name=profile.full_name,
-        display_name=profile.display_name,
-        headline=profile.headline,
-        avatar_url=profile.avatar_url,
-        university=profile.university,
-        major=profile.major,
-        graduation_year=profile.graduation_year,
-        bio=profile.bio,
-        skills=profile.skills or [],
-        tech_stack=profile.tech_stack or [],
-        roles=profile.roles or [],
-        preferred_roles=profile.preferred_roles or [],
-        availability=profile.availability,
-        hours_per_week=profile.hours_per_week,
-        timezone=profile.timezone,
-        github_url=profile.github_url,
-        linkedin_url=profile.linkedin_url,
-        portfolio_url=profile.portfolio_url,
-        links=profile.links or {},
-        interests=profile.interests or [],
-        profile_completeness=profile.profile_completeness
-    )
+    return ProfileResponse.model_validate(profile)
 
 
 @router.patch("/me", response_model=ProfileResponse)
@@ -122,67 +227,19 @@ async def update_my_profile(data: ProfileUpdate, current_user: CurrentUser, db:
     update_data = data.model_dump(exclude_unset=True)
     profile = await update_profile(db, profile, update_data)
     
-    return ProfileResponse(
-        id=profile.id,
-        user_id=profile.user_id,
-        full_name=profile.full_name,
-        display_name=profile.display_name,
-        headline=profile.headline,
-        avatar_url=profile.avatar_url,
-        university=profile.university,
-        major=profile.major,
-        graduation_year=profile.graduation_year,
-        bio=profile.bio,
-        skills=profile.skills or [],
-        tech_stack=profile.tech_stack or [],
-        roles=profile.roles or [],
-        preferred_roles=profile.preferred_roles or [],
-        availability=profile.availability,
-        hours_per_week=profile.hours_per_week,
-        timezone=profile.timezone,
-        github_url=profile.github_url,
-        linkedin_url=profile.linkedin_url,
-        portfolio_url=profile.portfolio_url,
-        links=profile.links or {},
-        interests=profile.interests or [],
-        profile_completeness=profile.profile_completeness
-    )
+    return ProfileResponse.model_validate(profile)
 
 
 @router.get("/{user_id}", response_model=ProfileResponse)
-async def get_user_profile(user_id: int, db: DBSession):
-    profile = await get_profile_by_user_id(db, user_id)
+async def get_user_profile(user_id: int):
+    profile = await get_user_profile_response(user_id)
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Profile not found"
         )
     
-    return ProfileResponse(
-        id=profile.id,
-        user_id=profile.user_id,
-        full_name=profile.full_name,
-        display_name=profile.display_name,
-        headline=profile.headline,
-        avatar_url=profile.avatar_url,
-        university=profile.university,
-        major=profile.major,
-        graduation_year=profile.graduation_year,
-        bio=profile.bio,
-        skills=profile.skills or [],
-        tech_stack=profile.tech_stack or [],
-        roles=profile.roles or [],
-        preferred_roles=profile.preferred_roles or [],
-        availability=profile.availability,
-        hours_per_week=profile.hours_per_week,
-        timezone=profile.timezone,
-        github_url=profile.github_url,
-        linkedin_url=profile.linkedin_url,
-        portfolio_url=profile.portfolio_url,
-        links=profile.links or {},
-        interests=profile.interests or [],
-        profile_completeness=profile.profile_completeness
-    )
+    return profile
 
 
 @router.post("/me/avatar", response_model=ProfileResponse)
@@ -191,7 +248,11 @@ async def upload_avatar(
     db: DBSession,
     file: UploadFile = File(...)
 ):
-    """Upload avatar image for the current user's profile."""
+    """
+    Upload avatar image for the current user's profile. The upload itself is
+    never stored where it can be served: only its resized, metadata-free WebP
+    re-encoding (animated for animated GIF/WebP) is published.
+    """
     profile = await get_profile_by_user_id(db, current_user.id)
     if not profile:
         raise HTTPException(
@@ -207,92 +268,38 @@ async def upload_avatar(
             detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
         )
     
-    # Read file content
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
-        )
+    invalid_image = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid image file content. File does not appear to be a valid image."
+    )
+    too_large = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
+    )
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise too_large
     
     # Validate file content (magic bytes) - prevents uploading malicious files with fake extensions
-    image_type = detect_image_type(content)
+    image_type = detect_image_type(await file.read(_MAGIC_BYTES_LEN))
     if image_type is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid image file content. File does not appear to be a valid image."
-        )
-    
-    # Delete old avatar if exists
-    if profile.avatar_url and profile.avatar_url.startswith("/api/profile/avatars/"):
-        old_filename = profile.avatar_url.split("/")[-1]
-        old_path = os.path.join(UPLOAD_DIR, old_filename)
-        if os.path.exists(old_path):
-            os.remove(old_path)
+        raise invalid_image
+    await file.seek(0)
     
-    # Save new avatar
-    filename = f"{current_user.id}_{uuid.uuid4().hex}{ext}"
-    filepath = os.path.join(UPLOAD_DIR, filename)
-    with open(filepath, "wb") as f:
-        f.write(content)
+    received = await run_in_threadpool(_receive_upload, file.file)
+    if received is None:
+        raise too_large
+    tmp_path, digest = received
+    try:
+        filename = await run_in_threadpool(_transcode_avatar, tmp_path, digest)
+    finally:
+        await run_in_threadpool(_remove_quietly, tmp_path)
+    if filename is None:
+        raise invalid_image
     
-    # Update profile with new avatar URL
-    avatar_url = f"/api/profile/avatars/{filename}"
+    old_url = profile.avatar_url
+    avatar_url = f"{AVATAR_URL_PREFIX}{filename}"
     profile = await update_profile(db, profile, {"avatar_url": avatar_url})
+    if old_url and old_url != avatar_url:
+        await _discard_avatar(db, old_url)
     
-    return ProfileResponse(
-        id=profile.id,
-        user_id=profile.user_id,
-        full_name=profile.full_name,
-        display_name=profile.display_name,
-        headline=profile.headline,
-        avatar_url=profile.avatar_url,
-        university=profile.university,
-        major=profile.major,
-        graduation_year=profile.graduation_year,
-        bio=profile.bio,
-        skills=profile.skills or [],
-        tech_stack=profile.tech_stack or [],
-        roles=profile.roles or [],
-        preferred_roles=profile.preferred_roles or [],
-        availability=profile.availability,
-        hours_per_week=profile.hours_per_week,
-        timezone=profile.timezone,
-        github_url=profile.github_url,
-        linkedin_url=profile.linkedin_url,
-        portfolio_url=profile.portfolio_url,
-        links=profile.links or {},
-        interests=profile.interests or [],
-        profile_completeness=profile.profile_completeness
-    )
-
-
-@router.get("/avatars/{filename}")
-async def get_avatar(filename: str):
-    """Serve avatar image with path traversal protection."""
-    # Prevent path traversal attacks - only use the basename
-    safe_filename = os.path.basename(filename)
-    
-    # Reject any attempt to use directory traversal
-    if safe_filename != filename or ".." in filename or "/" in filename or "\\" in filename:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid filename"
-        )
-    
-    filepath = os.path.join(UPLOAD_DIR, safe_filename)
-    
-    # Double-check the resolved path is within UPLOAD_DIR
-    real_path = os.path.realpath(filepath)
-    if not real_path.startswith(UPLOAD_DIR):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid filename"
-        )
-    
-    if not os.path.exists(filepath):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Avatar not found"
-        )
-    return FileResponse(filepath)
+    return ProfileResponse.model_validate(profile)
@@ -1,100 +1,78 @@
-from typing import Optional, List
-from fastapi import APIRouter, HTTPException, status, Query
+import hashlib
+from typing import Dict, FrozenSet, List, NamedTuple, Optional
+import orjson
+from fastapi import APIRouter, HTTPException, Request, status, Query
+from fastapi.responses import ORJSONResponse, Response
+from app.core.cache import (
+    cache, bump_project_feed, project_feed_key, project_response_key,
+    PROJECT_FEED_GENERATION_KEY, PROJECT_FEED_TTL, PROJECT_RESPONSE_TTL
+)
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
 from app.routers.deps import DBSession, CurrentUser, VerifiedUser, OptionalUser
+from app.routers._builders import (
+    build_profile_response, build_profile_responses, get_user_profile_response, project_fields
+)
 from app.schemas import (
-    ProjectCreate, ProjectUpdate, ProjectResponse,
-    ProfileResponse, CollaborationResponse
+    ProjectCreate, ProjectUpdate, ProjectResponse, CollaborationResponse, ProfileResponse
 )
 from app.services import (
-    create_project, get_project_by_id, update_project, increment_project_views,
-    list_projects, get_user_projects, get_profile_by_user_id, check_profile_can_post,
+    create_project, get_project_by_id, get_project_row, update_project, record_project_view,
+    list_projects, get_user_projects, check_profile_can_post,
     get_project_collaborations
 )
+from app.models import CollaborationStatus, ProjectVisibility
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
 
-def build_profile_response(profile) -> Optional[ProfileResponse]:
-    if not profile:
-        return None
-    return ProfileResponse(
-        id=profile.id,
-        user_id=profile.user_id,
-        full_name=profile.full_name,
-        display_name=profile.display_name,
-        headline=profile.headline,
-        avatar_url=profile.avatar_url,
-        university=profile.university,
-        major=profile.major,
-        graduation_year=profile.graduation_year,
-        bio=profile.bio,
-        skills=profile.skills or [],
-        tech_stack=profile.tech_stack or [],
-        roles=profile.roles or [],
-        preferred_roles=profile.preferred_roles or [],
-        availability=profile.availability,
-        hours_per_week=profile.hours_per_week,
-        timezone=profile.timezone,
-        github_url=profile.github_url,
-        linkedin_url=profile.linkedin_url,
-        portfolio_url=profile.portfolio_url,
-        links=profile.links or {},
-        interests=profile.interests or [],
-        profile_completeness=profile.profile_completeness
-    )
-
-
-def build_project_response(project, include_team: bool = False) -> ProjectResponse:
-    creator_profile = None
-    if project.creator and project.creator.profile:
-        creator_profile = build_profile_response(project.creator.profile)
+def build_project_response(
+    project,
+    include_team: bool = False,
+    creator_profile: Optional[ProfileResponse] = None,
+    profiles: Optional[Dict[int, ProfileResponse]] = None
+) -> ProjectResponse:
+    """
+    `creator_profile`, when given, stands in for project.creator (not loaded on a
+    new project). `profiles` holds responses already built for this request.
+    """
+    if creator_profile is None and project.creator and project.creator.profile:
+        creator_profile = build_profile_response(project.creator.profile, profiles)
     
     team_members = None
     if include_team and project.collaborations:
-        team_members = []
-        for collab in project.collaborations:
-            if collab.status.value == "active":
-                collab_profile = None
-                if collab.collaborator and collab.collaborator.profile:
-                    collab_profile = build_profile_response(collab.collaborator.profile)
-                team_members.append(CollaborationResponse(
-                    id=collab.id,
-                    project_id=collab.project_id,
-                    collaborator_id=collab.collaborator_id,
-                    role=collab.role,
-                    status=collab.status.value,
-                    joined_at=collab.joined_at,
-                    ended_at=collab.ended_at,
-                    collaborator_profile=collab_profile
-                ))
-    
-    application_count = len(project.applications) if project.applications else 0
-    
-    return ProjectResponse(
-        id=project.id,
-        creator_id=project.creator_id,
-        title=project.title,
-        description=project.description,
-        detailed_description=project.detailed_description,
-        category=project.category.value,
-        tech_stack=project.tech_stack or [],
-        roles_needed=project.roles_needed or [],
-        commitment_hours=project.commitment_hours,
-        duration=project.duration.value,
-        team_size=project.team_size,
-        status=project.status.value,
-        visibility=project.visibility.value,
-        created_at=project.created_at,
-        deadline=project.deadline,
-        views_count=project.views_count,
-        project_links=project.project_links,
+        team_members = [
+            CollaborationResponse.model_construct(
+                id=collab.id,
+                project_id=collab.project_id,
+                collaborator_id=collab.collaborator_id,
+                role=collab.role,
+                status=CollaborationStatus.ACTIVE.value,
+                joined_at=collab.joined_at,
+                ended_at=collab.ended_at,
+                collaborator_profile=(
+                    build_profile_response(collab.collaborator.profile)
+                    if collab.collaborator and collab.collaborator.profile else None
+                )
+            )
+            for collab in project.collaborations
+            if collab.status is CollaborationStatus.ACTIVE
+        ]
+    
+    return ProjectResponse.model_construct(
+        **project_fields(project),
         creator_profile=creator_profile,
-        application_count=application_count,
+        application_count=project.application_count or 0,
         team_members=team_members
     )
 
 
-@router.get("", response_model=List[ProjectResponse])
+def build_project_list(projects) -> list:
+    """JSON-ready project cards; a creator with several projects on the page is built once."""
+    profiles = build_profile_responses(p.creator.profile for p in projects if p.creator)
+    return [build_project_response(p, profiles=profiles).model_dump(mode="json") for p in projects]
+
+
+@router.get("", response_class=ORJSONResponse, responses={200: {"model": List[ProjectResponse]}})
 async def get_projects(
     db: DBSession,
     skip: int = Query(0, ge=0),
@@ -105,10 +83,33 @@ async def get_projects(
     commitment: Optional[str] = None,
     duration: Optional[str] = None,
     search: Optional[str] = None,
+    before: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
 ):
+    cursor = None
+    if before:
+        try:
+            cursor = decode_cursor(before)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    
+    cache_key = project_feed_key(
+        await cache.get(PROJECT_FEED_GENERATION_KEY),
+        (skip, limit, category, tech_stack, role, commitment, duration, search, before)
+    )
+    # The page body and its next cursor ("" on the last page) in one round-trip
+    cursor_key = f"{cache_key}:next"
+    cached, cached_cursor = await cache.get_many([cache_key, cursor_key])
+    if cached is not None:
+        response = Response(cached, media_type="application/json")
+        if cached_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = (
+                cached_cursor.decode() if isinstance(cached_cursor, bytes) else cached_cursor
+            )
+        return response
+    
     tech_stack_list = tech_stack.split(",") if tech_stack else None
     
-    projects = await list_projects(
+    projects, boundary = await list_projects(
         db,
         skip=skip,
         limit=limit,
@@ -117,15 +118,22 @@ async def get_projects(
         role=role,
         commitment=commitment,
         duration=duration,
-        search=search
+        search=search,
+        before=cursor
     )
     
-    return [build_project_response(p) for p in projects]
+    response = ORJSONResponse(build_project_list(projects))
+    next_cursor = encode_cursor(boundary.created_at, boundary.id) if boundary else ""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    await cache.set_many({cache_key: response.body, cursor_key: next_cursor}, PROJECT_FEED_TTL)
+    return response
 
 
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_project(data: ProjectCreate, current_user: VerifiedUser, db: DBSession):
-    profile = await get_profile_by_user_id(db, current_user.id)
+    # Usually a cache hit; profile writes drop the entry
+    profile = await get_user_profile_response(current_user.id)
     
     if not check_profile_can_post(profile):
         raise HTTPException(
@@ -134,42 +142,91 @@ async def create_new_project(data: ProjectCreate, current_user: VerifiedUser, db
         )
     
     project = await create_project(db, current_user.id, data.model_dump())
-    project = await get_project_by_id(db, project.id)
+    await bump_project_feed()
     
-    return build_project_response(project, include_team=True)
+    # A new project has no team or applications, and its creator's profile was
+    # just read for the gate, so nothing needs loading back
+    return build_project_response(project, creator_profile=profile)
 
 
-@router.get("/my", response_model=List[ProjectResponse])
+@router.get("/my", response_class=ORJSONResponse, responses={200: {"model": List[ProjectResponse]}})
 async def get_my_projects(current_user: CurrentUser, db: DBSession):
     projects = await get_user_projects(db, current_user.id)
-    return [build_project_response(p) for p in projects]
+    return ORJSONResponse(build_project_list(projects))
 
 
-@router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(project_id: int, db: DBSession, current_user: OptionalUser = None):
+class ProjectDetail(NamedTuple):
+    """A serialized project detail response (team included) with what serving it checks."""
+    etag: str
+    # Who may see an unlisted project (creator and active collaborators); None when public
+    viewers: Optional[FrozenSet[int]]
+    body: bytes
+
+
+def _pack_project_detail(detail: ProjectDetail) -> bytes:
+    # One small JSON header line ahead of the body, so a hit never parses the body
+    header = orjson.dumps({
+        "etag": detail.etag,
+        "viewers": sorted(detail.viewers) if detail.viewers is not None else None,
+    })
+    return header + b"\n" + detail.body
+
+
+def _unpack_project_detail(packed: bytes) -> ProjectDetail:
+    header, _, body = packed.partition(b"\n")
+    fields = orjson.loads(header)
+    viewers = fields["viewers"]
+    return ProjectDetail(fields["etag"], frozenset(viewers) if viewers is not None else None, body)
+
+
+async def get_project_detail(db, project_id: int) -> Optional[ProjectDetail]:
+    """The project detail response and its access fields, from the cache when possible."""
+    key = project_response_key(project_id)
+    packed = await cache.get(key)
+    if packed is not None:
+        return _unpack_project_detail(packed)
+    
     project = await get_project_by_id(db, project_id)
     if not project:
+        return None
+    response = build_project_response(project, include_team=True)
+    body = ORJSONResponse(response.model_dump(mode="json")).body
+    viewers = None
+    if project.visibility is ProjectVisibility.UNLISTED:
+        # team_members lists active collaborators only
+        viewers = frozenset(
+            [project.creator_id, *(member.collaborator_id for member in response.team_members or ())]
+        )
+    detail = ProjectDetail(f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', viewers, body)
+    await cache.set(key, _pack_project_detail(detail), PROJECT_RESPONSE_TTL)
+    return detail
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+@router.get("/{project_id}", response_model=ProjectResponse)
+async def get_project(project_id: int, request: Request, db: DBSession, current_user: OptionalUser = None):
+    detail = await get_project_detail(db, project_id)
+    if detail is None or (
+        detail.viewers is not None and (not current_user or current_user.id not in detail.viewers)
+    ):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
     
-    if project.visibility.value == "unlisted":
-        if not current_user or current_user.id != project.creator_id:
-            is_collaborator = any(
-                c.collaborator_id == current_user.id and c.status.value == "active"
-                for c in project.collaborations
-            ) if current_user else False
-            
-            if not is_collaborator:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Project not found"
-                )
-    
-    await increment_project_views(db, project)
+    record_project_view(project_id)
     
-    return build_project_response(project, include_team=True)
+    # no-cache: the browser keeps its copy but revalidates it, so an edit shows up at once
+    headers = {"ETag": detail.etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), detail.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(detail.body, media_type="application/json", headers=headers)
 
 
 @router.patch("/{project_id}", response_model=ProjectResponse)
@@ -194,14 +251,15 @@ async def update_existing_project(
     
     update_data = data.model_dump(exclude_unset=True)
     project = await update_project(db, project, update_data)
-    project = await get_project_by_id(db, project.id)
+    await bump_project_feed()
+    await cache.delete(project_response_key(project.id))
     
     return build_project_response(project, include_team=True)
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_project(project_id: int, current_user: VerifiedUser, db: DBSession):
-    project = await get_project_by_id(db, project_id)
+    project = await get_project_row(db, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -215,4 +273,6 @@ async def delete_project(project_id: int, current_user: VerifiedUser, db: DBSess
         )
     
     await update_project(db, project, {"status": "cancelled"})
+    await bump_project_feed()
+    await cache.delete(project_response_key(project.id))
     return None
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, status
 from app.routers.deps import DBSession, VerifiedUser
 from app.schemas import ReportCreate, ReportResponse
-from app.services import create_report, get_project_by_id, get_user_by_id
+from app.services import create_report, get_project_row, get_user_by_id
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
@@ -28,7 +28,7 @@ async def submit_report(data: ReportCreate, current_user: VerifiedUser, db: DBSe
             )
     
     if data.reported_project_id:
-        project = await get_project_by_id(db, data.reported_project_id)
+        project = await get_project_row(db, data.reported_project_id)
         if not project:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -18,6 +18,8 @@ from app.schemas.schemas import (
     MessageCreate,
     MessageResponse,
     ConversationResponse,
+    MessagePreview,
+    ConversationListItem,
     NotificationResponse,
     ReportCreate,
     ReportResponse,
@@ -46,6 +48,8 @@ __all__ = [
     "MessageCreate",
     "MessageResponse",
     "ConversationResponse",
+    "MessagePreview",
+    "ConversationListItem",
     "NotificationResponse",
     "ReportCreate",
     "ReportResponse",
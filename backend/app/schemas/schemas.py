@@ -1,15 +1,54 @@
 from datetime import datetime
-from typing import Optional, List
-import re
-import bleach
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from html import escape
+from html.parser import HTMLParser
+from typing import Annotated, Literal, Optional, List
+import string
+from pydantic import BaseModel, BeforeValidator, EmailStr, Field, field_validator
+
+
+_UPPERCASE = frozenset(string.ascii_uppercase)
+_LOWERCASE = frozenset(string.ascii_lowercase)
+
+# Enum-like string fields; pydantic-core checks Literal values without a Python validator
+ProjectCategoryValue = Literal["coursework", "hackathon", "startup", "learning", "open_source"]
+ProjectDurationValue = Literal["less_than_1_month", "1_to_3_months", "3_to_6_months", "ongoing"]
+ProjectCreateStatusValue = Literal["draft", "open"]
+ProjectStatusValue = Literal["draft", "open", "in_progress", "filled", "completed", "cancelled"]
+ApplicationDecisionValue = Literal["accepted", "rejected", "withdrawn"]
+ReportReasonValue = Literal["spam", "harassment", "fake_profile", "inappropriate_content", "other"]
+
+
+# C0 control characters other than tab, newline and carriage return
+_CONTROL_CHARS = dict.fromkeys(c for c in range(0x20) if chr(c) not in "\t\n\r")
+
+
+class _TextExtractor(HTMLParser):
+    """Collects text content; tags and comments are dropped."""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+    
+    def handle_data(self, data: str) -> None:
+        self.parts.append(data)
 
 
 def sanitize_html(value: Optional[str]) -> Optional[str]:
     """Strip all HTML tags from a string to prevent XSS."""
-    if value is None:
-        return None
-    return bleach.clean(value, tags=[], strip=True)
+    if not isinstance(value, str):
+        return value  # None, or a non-string the str schema will reject
+    value = value.translate(_CONTROL_CHARS)
+    if "<" not in value and "&" not in value and ">" not in value:
+        return value
+    parser = _TextExtractor()
+    parser.feed(value)
+    parser.close()
+    # Text comes back escaped, as bleach.clean(tags=[], strip=True) returned it
+    return escape("".join(parser.parts), quote=False)
+
+
+# Free text from users; tags are stripped before the str checks run
+SafeStr = Annotated[str, BeforeValidator(sanitize_html)]
 
 
 class UserCreate(BaseModel):
@@ -24,11 +63,12 @@ class UserCreate(BaseModel):
             raise ValueError("Password must be at least 8 characters")
         if " " in v:
             raise ValueError("Password must not contain spaces")
-        if not re.search(r"[A-Z]", v):
+        # Set scans run in C; isdecimal matches what \d did
+        if _UPPERCASE.isdisjoint(v):
             raise ValueError("Password must contain at least one uppercase letter")
-        if not re.search(r"[a-z]", v):
+        if _LOWERCASE.isdisjoint(v):
             raise ValueError("Password must contain at least one lowercase letter")
-        if not re.search(r"\d", v):
+        if not any(map(str.isdecimal, v)):
             raise ValueError("Password must contain at least one digit")
         return v
 
@@ -68,15 +108,15 @@ class ProfileLinks(BaseModel):
 
 
 class ProfileCreate(BaseModel):
-    full_name: str = Field(min_length=1, max_length=100)
-    headline: Optional[str] = None
+    full_name: SafeStr = Field(min_length=1, max_length=100)
+    headline: Optional[SafeStr] = None
     skills: List[str] = Field(min_length=1)
     roles: Optional[List[str]] = []
     avatar_url: Optional[str] = None
-    university: Optional[str] = None
-    major: Optional[str] = None
+    university: Optional[SafeStr] = None
+    major: Optional[SafeStr] = None
     graduation_year: Optional[int] = None
-    bio: Optional[str] = None
+    bio: Optional[SafeStr] = None
     tech_stack: Optional[List[str]] = []
     availability: Optional[str] = None
     hours_per_week: Optional[int] = None
@@ -85,24 +125,19 @@ class ProfileCreate(BaseModel):
     linkedin_url: Optional[str] = None
     portfolio_url: Optional[str] = None
     interests: Optional[List[str]] = []
-    
-    @field_validator("full_name", "headline", "bio", "university", "major", mode="before")
-    @classmethod
-    def sanitize_text_fields(cls, v):
-        return sanitize_html(v)
 
 
 class ProfileUpdate(BaseModel):
-    full_name: Optional[str] = Field(None, min_length=1, max_length=100)
-    display_name: Optional[str] = Field(None, min_length=1, max_length=100)
-    headline: Optional[str] = None
+    full_name: Optional[SafeStr] = Field(None, min_length=1, max_length=100)
+    display_name: Optional[SafeStr] = Field(None, min_length=1, max_length=100)
+    headline: Optional[SafeStr] = None
     skills: Optional[List[str]] = None
     roles: Optional[List[str]] = None
     avatar_url: Optional[str] = None
-    university: Optional[str] = None
-    major: Optional[str] = None
+    university: Optional[SafeStr] = None
+    major: Optional[SafeStr] = None
     graduation_year: Optional[int] = None
-    bio: Optional[str] = None
+    bio: Optional[SafeStr] = None
     tech_stack: Optional[List[str]] = None
     preferred_roles: Optional[List[str]] = None
     availability: Optional[str] = None
@@ -113,11 +148,6 @@ class ProfileUpdate(BaseModel):
     portfolio_url: Optional[str] = None
     links: Optional[ProfileLinks] = None
     interests: Optional[List[str]] = None
-    
-    @field_validator("full_name", "display_name", "headline", "bio", "university", "major", mode="before")
-    @classmethod
-    def sanitize_text_fields(cls, v):
-        return sanitize_html(v)
 
 
 class ProfileResponse(BaseModel):
@@ -145,96 +175,50 @@ class ProfileResponse(BaseModel):
     interests: List[str] = []
     profile_completeness: int = 0
 
+    @field_validator("skills", "tech_stack", "roles", "preferred_roles", "interests", mode="before")
+    @classmethod
+    def null_list_as_empty(cls, v):
+        return v or []
+
+    @field_validator("links", mode="before")
+    @classmethod
+    def null_links_as_empty(cls, v):
+        return v or {}
+
     class Config:
         from_attributes = True
 
 
 class ProjectCreate(BaseModel):
-    title: str = Field(min_length=1, max_length=100)
-    description: str = Field(min_length=1, max_length=500)
-    detailed_description: Optional[str] = None
-    category: str
+    title: SafeStr = Field(min_length=1, max_length=100)
+    description: SafeStr = Field(min_length=1, max_length=500)
+    detailed_description: Optional[SafeStr] = None
+    category: ProjectCategoryValue
     tech_stack: Optional[List[str]] = []
     roles_needed: List[str] = Field(min_length=1)
     commitment_hours: str
-    duration: str
+    duration: ProjectDurationValue
     team_size: int = Field(ge=1, le=20)
     visibility: Optional[str] = "public"
     deadline: Optional[datetime] = None
     project_links: Optional[dict] = None
-    status: Optional[str] = "draft"
-    
-    @field_validator("title", "description", "detailed_description", mode="before")
-    @classmethod
-    def sanitize_text_fields(cls, v):
-        return sanitize_html(v)
-
-    @field_validator("category")
-    def validate_category(cls, v):
-        valid = ["coursework", "hackathon", "startup", "learning", "open_source"]
-        if v not in valid:
-            raise ValueError(f"category must be one of {valid}")
-        return v
-
-    @field_validator("duration")
-    def validate_duration(cls, v):
-        valid = ["less_than_1_month", "1_to_3_months", "3_to_6_months", "ongoing"]
-        if v not in valid:
-            raise ValueError(f"duration must be one of {valid}")
-        return v
-
-    @field_validator("status")
-    def validate_status(cls, v):
-        if v is not None:
-            valid = ["draft", "open"]
-            if v not in valid:
-                raise ValueError(f"status must be one of {valid} when creating")
-        return v
+    status: Optional[ProjectCreateStatusValue] = "draft"
 
 
 class ProjectUpdate(BaseModel):
-    title: Optional[str] = Field(None, min_length=1, max_length=100)
-    description: Optional[str] = Field(None, min_length=1, max_length=500)
-    detailed_description: Optional[str] = None
-    category: Optional[str] = None
+    title: Optional[SafeStr] = Field(None, min_length=1, max_length=100)
+    description: Optional[SafeStr] = Field(None, min_length=1, max_length=500)
+    detailed_description: Optional[SafeStr] = None
+    category: Optional[ProjectCategoryValue] = None
     tech_stack: Optional[List[str]] = None
     roles_needed: Optional[List[str]] = None
     commitment_hours: Optional[str] = None
-    duration: Optional[str] = None
+    duration: Optional[ProjectDurationValue] = None
     team_size: Optional[int] = Field(None, ge=1, le=20)
-    status: Optional[str] = None
+    status: Optional[ProjectStatusValue] = None
     visibility: Optional[str] = None
     deadline: Optional[datetime] = None
     project_links: Optional[dict] = None
-    
-    @field_validator("title", "description", "detailed_description", mode="before")
-    @classmethod
-    def sanitize_text_fields(cls, v):
-        return sanitize_html(v)
-
-    @field_validator("category")
-    def validate_category(cls, v):
-        if v is not None:
-            valid = ["coursework", "hackathon", "startup", "learning", "open_source"]
-            if v not in valid:
-                raise ValueError(f"category must be one of {valid}")
-        return v
-
-    @field_validator("duration")
-    def validate_duration(cls, v):
-        if v is not None:
-            valid = ["less_than_1_month", "1_to_3_months", "3_to_6_months", "ongoing"]
-            if v not in valid:
-                raise ValueError(f"duration must be one of {valid}")
-        return v
-
-    @field_validator("status")
-    def validate_status(cls, v):
-        if v is not None:
-            valid = ["draft", "open", "in_progress", "filled", "completed", "cancelled"]
-            if v not in valid:
-                raise ValueError(f"status must be one of {valid}")
-        return v
 
 
 class ProjectResponse(BaseModel):
@@ -270,14 +254,7 @@ class ApplicationCreate(BaseModel):
 
 
 class ApplicationUpdate(BaseModel):
-    status: str
-
-    @field_validator("status")
-    def validate_status(cls, v):
-        valid = ["accepted", "rejected", "withdrawn"]
-        if v not in valid:
-            raise ValueError(f"status must be one of {valid}")
-        return v
+    status: ApplicationDecisionValue
 
 
 class ApplicationResponse(BaseModel):
@@ -341,6 +318,26 @@ class ConversationResponse(BaseModel):
         from_attributes = True
 
 
+class MessagePreview(BaseModel):
+    id: int
+    sender_id: int
+    content: str
+    created_at: datetime
+
+
+class ConversationListItem(BaseModel):
+    """Conversation as shown in the inbox: no message history, just the latest one."""
+    id: int
+    project_id: Optional[int]
+    participant_ids: List[int]
+    type: str
+    created_at: datetime
+    last_message_at: Optional[datetime]
+    project: Optional[ProjectResponse] = None
+    last_message: Optional[MessagePreview] = None
+    unread_count: int = 0
+
+
 class NotificationResponse(BaseModel):
     id: int
     user_id: int
@@ -360,16 +357,9 @@ class NotificationResponse(BaseModel):
 class ReportCreate(BaseModel):
     reported_user_id: Optional[int] = None
     reported_project_id: Optional[int] = None
-    reason: str
+    reason: ReportReasonValue
     details: Optional[str] = None
 
-    @field_validator("reason")
-    def validate_reason(cls, v):
-        valid = ["spam", "harassment", "fake_profile", "inappropriate_content", "other"]
-        if v not in valid:
-            raise ValueError(f"reason must be one of {valid}")
-        return v
-
 
 class ReportResponse(BaseModel):
     id: int
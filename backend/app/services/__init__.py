@@ -2,28 +2,39 @@ from app.services.user_service import (
     create_user,
     get_user_by_email,
     get_user_by_id,
+    get_authenticated_user,
+    forget_authenticated_user,
     authenticate_user,
     verify_user_email,
     update_last_active,
     update_user_password,
     get_profile_by_user_id,
+    get_profiles_by_user_ids,
+    fetch_profile_by_user_id,
     create_profile,
     update_profile,
+    avatar_url_in_use,
+    get_avatar_urls,
+    replace_avatar_url,
     check_profile_can_post,
 )
 
 from app.services.project_service import (
     create_project,
     get_project_by_id,
+    get_project_row,
     update_project,
-    increment_project_views,
+    record_project_view,
+    flush_project_views,
     list_projects,
     get_user_projects,
     create_application,
     get_application_by_id,
     get_existing_application,
+    get_project_and_existing_application,
     get_project_applications,
     get_user_applications,
+    stream_user_applications,
     update_application_status,
     mark_application_viewed,
     create_collaboration,
@@ -39,15 +50,20 @@ from app.services.project_service import (
 
 from app.services.messaging_service import (
     get_conversation_by_id,
+    get_conversation_row,
     get_user_conversations,
     get_conversation_messages,
     create_message,
     mark_messages_as_read,
-    check_user_in_conversation,
+    mark_new_messages_as_read,
+    is_participant,
 )
 
 from app.services.notification_service import (
     create_notification,
+    create_notifications,
+    send_notification,
+    send_notifications,
     get_user_notifications,
     mark_notification_as_read,
     mark_all_notifications_as_read,
@@ -57,6 +73,7 @@ from app.services.notification_service import (
 
 from app.services.report_service import (
     create_report,
+    create_reports_bulk,
     get_report_by_id,
     get_user_reports,
 )
@@ -1,29 +1,36 @@
 """Email service for sending verification emails."""
-import smtplib
 import logging
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import List, Optional, Tuple
+import aiosmtplib
 from app.core.config import settings
 from app.core.verification_security import mask_email
 
 logger = logging.getLogger(__name__)
 
 
-def get_verification_email_html(
+def _email_html(
+    title: str,
+    heading: str,
+    intro: str,
+    code_label: str,
     otp: str,
-    verification_link: str,
-    otp_expiry_minutes: int = 5,
-    link_expiry_minutes: int = 30
+    otp_expiry_minutes: int,
+    button_label: str,
+    link: str,
+    link_expiry_minutes: int,
+    notice: str
 ) -> str:
-    """Generate HTML email with OTP and verification link."""
+    """The branded layout both emails share: a code, an OR divider and a link button."""
     return f"""
 <!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Verify Your Email - Collabers</title>
+    <title>{title} - Collabers</title>
 </head>
 <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #f5f5f5;">
     <table role="presentation" style="width: 100%; border-collapse: collapse;">
@@ -41,14 +48,14 @@ def get_verification_email_html(
                     <!-- Content -->
                     <tr>
                         <td style="padding: 40px;">
-                            <h2 style="margin: 0 0 20px; color: #1f2937; font-size: 24px; font-weight: 600;">Verify Your Email Address</h2>
+                            <h2 style="margin: 0 0 20px; color: #1f2937; font-size: 24px; font-weight: 600;">{heading}</h2>
                             <p style="margin: 0 0 30px; color: #6b7280; font-size: 16px; line-height: 1.6;">
-                                Thank you for signing up! Please verify your email address using one of the methods below.
+                                {intro}
                             </p>
                             
                             <!-- OTP Section -->
                             <div style="background-color: #f3f4f6; border-radius: 8px; padding: 30px; text-align: center; margin-bottom: 30px;">
-                                <p style="margin: 0 0 15px; color: #374151; font-size: 14px; font-weight: 500;">Your Verification Code</p>
+                                <p style="margin: 0 0 15px; color: #374151; font-size: 14px; font-weight: 500;">{code_label}</p>
                                 <div style="font-size: 36px; font-weight: 700; letter-spacing: 8px; color: #4f46e5; font-family: 'Courier New', monospace;">
                                     {otp}
                                 </div>
@@ -65,9 +72,9 @@ def get_verification_email_html(
                             
                             <!-- Link Button -->
                             <div style="text-align: center; margin: 30px 0;">
-                                <a href="{verification_link}" 
+                                <a href="{link}" 
                                    style="display: inline-block; padding: 16px 40px; background-color: #4f46e5; color: #ffffff; text-decoration: none; font-size: 16px; font-weight: 600; border-radius: 8px; transition: background-color 0.2s;">
-                                    Verify via Secure Link
+                                    {button_label}
                                 </a>
                                 <p style="margin: 15px 0 0; color: #9ca3af; font-size: 12px;">
                                     This link expires in {link_expiry_minutes} minutes
@@ -77,7 +84,7 @@ def get_verification_email_html(
                             <!-- Security Notice -->
                             <div style="background-color: #fef3c7; border-left: 4px solid #f59e0b; padding: 15px; margin-top: 30px; border-radius: 0 8px 8px 0;">
                                 <p style="margin: 0; color: #92400e; font-size: 14px;">
-                                    <strong>Security Notice:</strong> If you didn't create an account with Collabers, please ignore this email. Never share your verification code with anyone.
+                                    <strong>Security Notice:</strong> {notice}
                                 </p>
                             </div>
                         </td>
@@ -103,6 +110,27 @@ def get_verification_email_html(
 """
 
 
+def get_verification_email_html(
+    otp: str,
+    verification_link: str,
+    otp_expiry_minutes: int = 5,
+    link_expiry_minutes: int = 30
+) -> str:
+    """Generate HTML email with OTP and verification link."""
+    return _email_html(
+        title="Verify Your Email",
+        heading="Verify Your Email Address",
+        intro="Thank you for signing up! Please verify your email address using one of the methods below.",
+        code_label="Your Verification Code",
+        otp=otp,
+        otp_expiry_minutes=otp_expiry_minutes,
+        button_label="Verify via Secure Link",
+        link=verification_link,
+        link_expiry_minutes=link_expiry_minutes,
+        notice="If you didn't create an account with Collabers, please ignore this email. Never share your verification code with anyone."
+    )
+
+
 def get_verification_email_text(
     otp: str,
     verification_link: str,
@@ -138,6 +166,104 @@ Need help? Contact us at support@collabers.com
 """
 
 
+def get_password_reset_email_html(otp: str, reset_link: str) -> str:
+    """Generate HTML email with reset code and reset link."""
+    return _email_html(
+        title="Reset Your Password",
+        heading="Reset Your Password",
+        intro="We received a request to reset your password. Use one of the methods below.",
+        code_label="Your Reset Code",
+        otp=otp,
+        otp_expiry_minutes=5,
+        button_label="Reset via Secure Link",
+        link=reset_link,
+        link_expiry_minutes=30,
+        notice="If you didn't request a password reset, please ignore this email and ensure your account is secure."
+    )
+
+
+def get_password_reset_email_text(otp: str, reset_link: str) -> str:
+    """Plain text version of the password reset email."""
+    return f"Your password reset code is: {otp}\n\nOr click: {reset_link}"
+
+
+def _build_message(to_email: str, subject: str, text: str, html: str) -> MIMEMultipart:
+    """A multipart/alternative message with plain text and HTML versions."""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = settings.SMTP_FROM_EMAIL
+    msg['To'] = to_email
+    msg.attach(MIMEText(text, 'plain'))
+    msg.attach(MIMEText(html, 'html'))
+    return msg
+
+
+# Logged-in SMTP sessions kept between sends, so a signup burst skips the
+# connect + STARTTLS + AUTH round-trips. Providers drop idle sessions after a
+# few minutes, so older ones are closed instead of reused.
+_SMTP_POOL_SIZE = 4
+_SMTP_IDLE_TIMEOUT = 100  # seconds
+_idle_smtp: List[Tuple[float, aiosmtplib.SMTP]] = []  # (last used, session), newest last
+
+
+async def _smtp_connect() -> aiosmtplib.SMTP:
+    server = aiosmtplib.SMTP(hostname=settings.SMTP_HOST, port=settings.SMTP_PORT, start_tls=True)
+    await server.connect()
+    try:
+        await server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+    except BaseException:
+        server.close()
+        raise
+    return server
+
+
+async def _smtp_close(server: aiosmtplib.SMTP) -> None:
+    try:
+        await server.quit()
+    except Exception:
+        server.close()
+
+
+async def _smtp_acquire() -> aiosmtplib.SMTP:
+    now = time.monotonic()
+    while _idle_smtp:
+        last_used, server = _idle_smtp.pop()
+        if server.is_connected and now - last_used < _SMTP_IDLE_TIMEOUT:
+            return server
+        await _smtp_close(server)
+    return await _smtp_connect()
+
+
+async def _smtp_release(server: aiosmtplib.SMTP) -> None:
+    if server.is_connected and len(_idle_smtp) < _SMTP_POOL_SIZE:
+        _idle_smtp.append((time.monotonic(), server))
+    else:
+        await _smtp_close(server)
+
+
+async def _smtp_send(msg: MIMEMultipart) -> None:
+    """Send via SMTP with STARTTLS on a pooled session."""
+    server = await _smtp_acquire()
+    try:
+        try:
+            await server.send_message(msg)
+        except aiosmtplib.SMTPServerDisconnected:
+            # A pooled session the server had already dropped; retry once on a new one
+            server.close()
+            server = await _smtp_connect()
+            await server.send_message(msg)
+    except BaseException:
+        server.close()
+        raise
+    await _smtp_release(server)
+
+
+async def close_smtp_pool() -> None:
+    """Log out of every pooled SMTP session; called on shutdown."""
+    while _idle_smtp:
+        await _smtp_close(_idle_smtp.pop()[1])
+
+
 async def send_verification_email(
     to_email: str,
     otp: str,
@@ -147,47 +273,31 @@ async def send_verification_email(
     if not settings.SMTP_HOST or not settings.SMTP_USER or not settings.SMTP_PASSWORD:
         logger.warning("SMTP not configured. Email sending disabled.")
         # In development, log that verification would be sent (but not the actual codes!)
-        logger.info(f"[DEV] Verification email would be sent to {mask_email(to_email)}")
+        logger.info("[DEV] Verification email would be sent to %s", mask_email(to_email))
         return False
     
     verification_link = f"{settings.FRONTEND_URL}/verify-email?token={link_token}"
     
     try:
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = 'Verify Your Email - Collabers'
-        msg['From'] = settings.SMTP_FROM_EMAIL
-        msg['To'] = to_email
-        
-        # Attach plain text and HTML versions
-        text_part = MIMEText(
-            get_verification_email_text(otp, verification_link), 
-            'plain'
-        )
-        html_part = MIMEText(
-            get_verification_email_html(otp, verification_link), 
-            'html'
+        msg = _build_message(
+            to_email,
+            'Verify Your Email - Collabers',
+            get_verification_email_text(otp, verification_link),
+            get_verification_email_html(otp, verification_link)
         )
+        await _smtp_send(msg)
         
-        msg.attach(text_part)
-        msg.attach(html_part)
-        
-        # Send via SMTP with TLS
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(msg)
-        
-        logger.info(f"Verification email sent to {mask_email(to_email)}")
+        logger.info("Verification email sent to %s", mask_email(to_email))
         return True
         
-    except smtplib.SMTPAuthenticationError:
+    except aiosmtplib.SMTPAuthenticationError:
         logger.error("SMTP authentication failed. Check SMTP_USER and SMTP_PASSWORD.")
         return False
-    except smtplib.SMTPException as e:
-        logger.error(f"SMTP error sending email: {type(e).__name__}")
+    except aiosmtplib.SMTPException as e:
+        logger.error("SMTP error sending email: %s", type(e).__name__)
         return False
     except Exception as e:
-        logger.error(f"Unexpected error sending email: {type(e).__name__}")
+        logger.error("Unexpected error sending email: %s", type(e).__name__)
         return False
 
 
@@ -202,93 +312,23 @@ async def send_password_reset_email(
     """
     if not settings.SMTP_HOST or not settings.SMTP_USER or not settings.SMTP_PASSWORD:
         logger.warning("SMTP not configured. Email sending disabled.")
-        logger.info(f"[DEV] Password reset email would be sent to {mask_email(to_email)}")
+        logger.info("[DEV] Password reset email would be sent to %s", mask_email(to_email))
         return False
     
     reset_link = f"{settings.FRONTEND_URL}/reset-password?token={link_token}"
     
-    html_content = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Reset Your Password - Collabers</title>
-</head>
-<body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #f5f5f5;">
-    <table role="presentation" style="width: 100%; border-collapse: collapse;">
-        <tr>
-            <td align="center" style="padding: 40px 0;">
-                <table role="presentation" style="width: 600px; max-width: 100%; border-collapse: collapse; background-color: #ffffff; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-                    <tr>
-                        <td style="padding: 40px 40px 20px; text-align: center; background-color: #4f46e5; border-radius: 8px 8px 0 0;">
-                            <h1 style="margin: 0; color: #ffffff; font-size: 28px; font-weight: 600;">Collabers</h1>
-                        </td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 40px;">
-                            <h2 style="margin: 0 0 20px; color: #1f2937; font-size: 24px;">Reset Your Password</h2>
-                            <p style="margin: 0 0 30px; color: #6b7280; font-size: 16px; line-height: 1.6;">
-                                We received a request to reset your password. Use one of the methods below.
-                            </p>
-                            
-                            <div style="background-color: #f3f4f6; border-radius: 8px; padding: 30px; text-align: center; margin-bottom: 30px;">
-                                <p style="margin: 0 0 15px; color: #374151; font-size: 14px; font-weight: 500;">Your Reset Code</p>
-                                <div style="font-size: 36px; font-weight: 700; letter-spacing: 8px; color: #4f46e5; font-family: 'Courier New', monospace;">
-                                    {otp}
-                                </div>
-                                <p style="margin: 15px 0 0; color: #9ca3af; font-size: 12px;">This code expires in 5 minutes</p>
-                            </div>
-                            
-                            <div style="text-align: center; margin: 30px 0;">
-                                <span style="display: inline-block; padding: 0 15px; background-color: #ffffff; color: #9ca3af; font-size: 14px;">OR</span>
-                                <hr style="margin-top: -10px; border: none; border-top: 1px solid #e5e7eb;">
-                            </div>
-                            
-                            <div style="text-align: center; margin: 30px 0;">
-                                <a href="{reset_link}" style="display: inline-block; padding: 16px 40px; background-color: #4f46e5; color: #ffffff; text-decoration: none; font-size: 16px; font-weight: 600; border-radius: 8px;">
-                                    Reset via Secure Link
-                                </a>
-                                <p style="margin: 15px 0 0; color: #9ca3af; font-size: 12px;">This link expires in 30 minutes</p>
-                            </div>
-                            
-                            <div style="background-color: #fef3c7; border-left: 4px solid #f59e0b; padding: 15px; margin-top: 30px; border-radius: 0 8px 8px 0;">
-                                <p style="margin: 0; color: #92400e; font-size: 14px;">
-                                    <strong>Security Notice:</strong> If you didn't request a password reset, please ignore this email and ensure your account is secure.
-                                </p>
-                            </div>
-                        </td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 30px 40px; background-color: #f9fafb; border-radius: 0 0 8px 8px; text-align: center;">
-                            <p style="margin: 0; color: #9ca3af; font-size: 12px;">&copy; 2024 Collabers. All rights reserved.</p>
-                        </td>
-                    </tr>
-                </table>
-            </td>
-        </tr>
-    </table>
-</body>
-</html>
-"""
-    
     try:
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = 'Reset Your Password - Collabers'
-        msg['From'] = settings.SMTP_FROM_EMAIL
-        msg['To'] = to_email
-        
-        msg.attach(MIMEText(f"Your password reset code is: {otp}\n\nOr click: {reset_link}", 'plain'))
-        msg.attach(MIMEText(html_content, 'html'))
-        
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(msg)
+        msg = _build_message(
+            to_email,
+            'Reset Your Password - Collabers',
+            get_password_reset_email_text(otp, reset_link),
+            get_password_reset_email_html(otp, reset_link)
+        )
+        await _smtp_send(msg)
         
-        logger.info(f"Password reset email sent to {mask_email(to_email)}")
+        logger.info("Password reset email sent to %s", mask_email(to_email))
         return True
         
     except Exception as e:
-        logger.error(f"Error sending password reset email: {type(e).__name__}")
+        logger.error("Error sending password reset email: %s", type(e).__name__)
         return False
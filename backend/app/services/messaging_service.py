@@ -1,9 +1,12 @@
 from datetime import datetime, timezone
-from typing import List, Optional
-from sqlalchemy import select, and_
+from typing import AsyncIterator, List, Optional, Tuple
+from sqlalchemy import Row, select, and_, func, insert, literal, exists, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from app.models import Conversation, Message, ConversationType, User
+from sqlalchemy.orm import aliased, joinedload, selectinload, raiseload
+from app.core.cache import cache, conversation_read_key, CONVERSATION_READ_TTL
+from app.models import (
+    Conversation, ConversationParticipant, Message, MessageRead, ConversationType
+)
 
 
 async def get_conversation_by_id(db: AsyncSession, conversation_id: int) -> Optional[Conversation]:
@@ -15,30 +18,93 @@ async def get_conversation_by_id(db: AsyncSession, conversation_id: int) -> Opti
     return result.scalar_one_or_none()
 
 
-async def get_user_conversations(db: AsyncSession, user_id: int) -> List[Conversation]:
+async def get_conversation_row(db: AsyncSession, conversation_id: int) -> Optional[Conversation]:
+    """The conversation with its participants only, for the membership check before a write."""
     result = await db.execute(
         select(Conversation)
-        .options(selectinload(Conversation.project))
+        .options(selectinload(Conversation.participants), raiseload("*"))
+        .where(Conversation.id == conversation_id)
+    )
+    return result.scalar_one_or_none()
+
+
+_CONVERSATION_BATCH = 100
+
+
+async def get_user_conversations(db: AsyncSession, user_id: int) -> AsyncIterator[Row]:
+    """
+    The user's conversations for the list view, newest activity first. Each row
+    carries the Conversation (with project and participants), the latest
+    message's id/content/created_at/sender_id (None when empty) and the user's
+    unread_count, all from one statement. The list is unbounded, so rows are
+    streamed in batches rather than loaded all at once.
+    """
+    last_message = aliased(Message)
+    last_message_id = (
+        select(func.max(Message.id))
+        .where(Message.conversation_id == Conversation.id)
+        .correlate(Conversation)
+        .scalar_subquery()
+    )
+    unread_count = (
+        select(func.count(Message.id))
+        .where(
+            and_(
+                Message.conversation_id == Conversation.id,
+                ~exists().where(
+                    and_(MessageRead.message_id == Message.id, MessageRead.user_id == user_id)
+                )
+            )
+        )
+        .correlate(Conversation)
+        .scalar_subquery()
+    )
+    result = await db.stream(
+        select(
+            Conversation,
+            last_message.id.label("last_message_id"),
+            last_message.content.label("last_message_content"),
+            last_message.created_at.label("last_message_created_at"),
+            last_message.sender_id.label("last_message_sender_id"),
+            unread_count.label("unread_count"),
+        )
+        .join(ConversationParticipant, ConversationParticipant.conversation_id == Conversation.id)
+        .outerjoin(last_message, last_message.id == last_message_id)
+        # The project is many-to-one, so it rides along in the same SELECT
+        .options(joinedload(Conversation.project), selectinload(Conversation.participants))
+        # The list view never touches messages or senders; fail loudly if it starts to
+        .options(raiseload("*"))
+        .where(ConversationParticipant.user_id == user_id)
         .order_by(Conversation.last_message_at.desc().nullslast())
+        .execution_options(yield_per=_CONVERSATION_BATCH)
     )
-    conversations = result.scalars().all()
-    return [c for c in conversations if user_id in c.participant_ids]
+    async for row in result:
+        yield row
 
 
 async def get_conversation_messages(
     db: AsyncSession,
     conversation_id: int,
     skip: int = 0,
-    limit: int = 50
+    limit: int = 50,
+    before: Optional[Tuple[datetime, int]] = None
 ) -> List[Message]:
-    result = await db.execute(
+    """
+    One page of messages in chronological order. `before` is a decoded
+    (created_at, id) cursor; when given, the page is the `limit` messages just
+    older than it and `skip` is ignored. Senders are not loaded; their
+    profiles are looked up per distinct sender_id by the caller.
+    """
+    query = (
         select(Message)
-        .options(selectinload(Message.sender).selectinload(User.profile))
         .where(Message.conversation_id == conversation_id)
-        .order_by(Message.created_at.desc())
-        .offset(skip)
-        .limit(limit)
+        .order_by(Message.created_at.desc(), Message.id.desc())
     )
+    if before is not None:
+        query = query.where(tuple_(Message.created_at, Message.id) < before)
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
     return list(reversed(result.scalars().all()))
 
 
@@ -48,23 +114,26 @@ async def create_message(
     sender_id: int,
     content: str
 ) -> Message:
+    now = datetime.now(timezone.utc)
     message = Message(
         conversation_id=conversation_id,
         sender_id=sender_id,
         content=content,
-        read_by=[sender_id]
+        created_at=now,
+        reads=[MessageRead(user_id=sender_id)]
     )
     db.add(message)
     
-    result = await db.execute(
-        select(Conversation).where(Conversation.id == conversation_id)
+    await db.execute(
+        update(Conversation)
+        .where(Conversation.id == conversation_id)
+        .values(last_message_at=now)
+        .execution_options(synchronize_session=False)
     )
-    conversation = result.scalar_one_or_none()
-    if conversation:
-        conversation.last_message_at = datetime.now(timezone.utc)
     
+    # Every column was set client-side and the id came back from the flush,
+    # so the message is returned as-is (sessions don't expire on commit)
     await db.commit()
-    await db.refresh(message)
     return message
 
 
@@ -73,18 +142,41 @@ async def mark_messages_as_read(
     conversation_id: int,
     user_id: int
 ) -> None:
-    result = await db.execute(
-        select(Message)
-        .where(Message.conversation_id == conversation_id)
+    already_read = exists().where(
+        and_(MessageRead.message_id == Message.id, MessageRead.user_id == user_id)
+    )
+    await db.execute(
+        insert(MessageRead).from_select(
+            ["message_id", "user_id"],
+            select(Message.id, literal(user_id))
+            .where(and_(Message.conversation_id == conversation_id, ~already_read))
+        )
     )
-    messages = result.scalars().all()
-    
-    for message in messages:
-        if user_id not in message.read_by:
-            message.read_by = message.read_by + [user_id]
-    
     await db.commit()
 
 
-async def check_user_in_conversation(conversation: Conversation, user_id: int) -> bool:
-    return user_id in conversation.participant_ids
+async def mark_new_messages_as_read(
+    db: AsyncSession,
+    conversation: Conversation,
+    user_id: int
+) -> None:
+    """
+    mark_messages_as_read, skipped when nothing was posted since this user's
+    last mark: the conversation's last_message_at is remembered per user.
+    """
+    if conversation.last_message_at is None:
+        return
+    marker = conversation.last_message_at.isoformat()
+    key = conversation_read_key(conversation.id, user_id)
+    cached = await cache.get(key)
+    if isinstance(cached, bytes):
+        cached = cached.decode()
+    if cached == marker:
+        return
+    await mark_messages_as_read(db, conversation.id, user_id)
+    await cache.set(key, marker, CONVERSATION_READ_TTL)
+
+
+def is_participant(conversation: Conversation, user_id: int) -> bool:
+    """Membership check against the participants loaded with the conversation."""
+    return any(p.user_id == user_id for p in conversation.participants)
@@ -1,6 +1,8 @@
-from typing import List, Optional
-from sqlalchemy import select, and_
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import select, and_, func, insert, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import async_session_maker
 from app.models import Notification, NotificationType
 
 
@@ -21,23 +23,77 @@ async def create_notification(
     )
     db.add(notification)
     await db.commit()
-    await db.refresh(notification)
     return notification
 
 
+async def create_notifications(
+    db: AsyncSession,
+    user_ids: Iterable[int],
+    notification_type: NotificationType,
+    reference_type: str,
+    reference_id: int,
+    message: Optional[str] = None
+) -> None:
+    """Fan the same notification out to many users with one bulk INSERT."""
+    rows = [
+        {
+            "user_id": user_id,
+            "type": notification_type,
+            "reference_type": reference_type,
+            "reference_id": reference_id,
+            "message": message,
+        }
+        for user_id in user_ids
+    ]
+    if not rows:
+        return
+    await db.execute(insert(Notification), rows)
+    await db.commit()
+
+
+async def send_notification(
+    user_id: int,
+    notification_type: NotificationType,
+    reference_type: str,
+    reference_id: int,
+    message: Optional[str] = None
+) -> None:
+    """Create a notification in its own session, so it can run alongside work on the request's session."""
+    async with async_session_maker() as db:
+        await create_notification(db, user_id, notification_type, reference_type, reference_id, message)
+
+
+async def send_notifications(
+    user_ids: Iterable[int],
+    notification_type: NotificationType,
+    reference_type: str,
+    reference_id: int,
+    message: Optional[str] = None
+) -> None:
+    """create_notifications in its own session, for use as a background task."""
+    async with async_session_maker() as db:
+        await create_notifications(db, user_ids, notification_type, reference_type, reference_id, message)
+
+
 async def get_user_notifications(
     db: AsyncSession,
     user_id: int,
     unread_only: bool = False,
     skip: int = 0,
-    limit: int = 50
+    limit: int = 50,
+    before: Optional[Tuple[datetime, int]] = None
 ) -> List[Notification]:
     query = select(Notification).where(Notification.user_id == user_id)
     
     if unread_only:
         query = query.where(Notification.read == False)
     
-    query = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit)
+    # Keyset page after a (created_at, id) cursor; skip only applies without one
+    if before is not None:
+        query = query.where(tuple_(Notification.created_at, Notification.id) < before)
+    else:
+        query = query.offset(skip)
+    query = query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit)
     
     result = await db.execute(query)
     return result.scalars().all()
@@ -46,25 +102,21 @@ async def get_user_notifications(
 async def mark_notification_as_read(db: AsyncSession, notification: Notification) -> Notification:
     notification.read = True
     await db.commit()
-    await db.refresh(notification)
     return notification
 
 
 async def mark_all_notifications_as_read(db: AsyncSession, user_id: int) -> None:
-    result = await db.execute(
-        select(Notification)
+    await db.execute(
+        update(Notification)
         .where(
             and_(
                 Notification.user_id == user_id,
                 Notification.read == False
             )
         )
+        .values(read=True)
+        .execution_options(synchronize_session=False)
     )
-    notifications = result.scalars().all()
-    
-    for notification in notifications:
-        notification.read = True
-    
     await db.commit()
 
 
@@ -76,8 +128,10 @@ async def get_notification_by_id(db: AsyncSession, notification_id: int) -> Opti
 
 
 async def get_unread_notification_count(db: AsyncSession, user_id: int) -> int:
+    # Answered from the partial unread index; no rows are loaded
     result = await db.execute(
-        select(Notification)
+        select(func.count())
+        .select_from(Notification)
         .where(
             and_(
                 Notification.user_id == user_id,
@@ -85,4 +139,4 @@ async def get_unread_notification_count(db: AsyncSession, user_id: int) -> int:
             )
         )
     )
-    return len(result.scalars().all())
+    return result.scalar_one()
@@ -1,70 +1,148 @@
+from collections import Counter
 from datetime import datetime, timezone
-from typing import Optional, List
-from sqlalchemy import select, func, or_, and_
+from typing import AsyncIterator, Optional, List, Sequence, Tuple
+from sqlalchemy import (
+    bindparam, cast, delete, exists, insert, literal, select, update, func, or_, and_, tuple_
+)
+from sqlalchemy.dialects.postgresql import JSONB, array, insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload, raiseload, with_expression
+from sqlalchemy.orm.attributes import set_committed_value
+from app.db.database import async_session_maker
 from app.models import (
     ProjectPost, Application, Collaboration, User, Profile,
     ProjectStatus, ProjectCategory, ProjectDuration, ProjectVisibility,
-    ApplicationStatus, CollaborationStatus, ConversationType, Conversation
+    ApplicationStatus, CollaborationStatus, ConversationType, Conversation,
+    ConversationParticipant, TEAM_CHAT_WHERE
 )
 
 
+# Request fields stored as enums, coerced from their string values on write
+_ENUM_COERCERS = {
+    "status": ProjectStatus,
+    "category": ProjectCategory,
+    "duration": ProjectDuration,
+    "visibility": ProjectVisibility,
+}
+
+
+def _coerce_enums(data: dict) -> dict:
+    coerced = {}
+    for key, value in data.items():
+        coerce = _ENUM_COERCERS.get(key)
+        coerced[key] = coerce(value) if coerce and value is not None else value
+    return coerced
+
+
 async def create_project(db: AsyncSession, creator_id: int, data: dict) -> ProjectPost:
-    status_str = data.pop("status", "draft")
-    status = ProjectStatus(status_str)
-    
-    category = ProjectCategory(data.pop("category"))
-    duration = ProjectDuration(data.pop("duration"))
-    visibility_str = data.pop("visibility", "public")
-    visibility = ProjectVisibility(visibility_str)
-    
-    project = ProjectPost(
-        creator_id=creator_id,
-        status=status,
-        category=category,
-        duration=duration,
-        visibility=visibility,
-        **data
-    )
+    data.setdefault("status", "draft")
+    data.setdefault("visibility", "public")
+    project = ProjectPost(creator_id=creator_id, **_coerce_enums(data))
     db.add(project)
     await db.commit()
-    await db.refresh(project)
     return project
 
 
+# Everything build_project_response reads, in the project SELECT itself: the
+# creator and profile are many-to-one joins and the application count is a
+# correlated COUNT, so a feed page is one statement. raiseload("*") makes any
+# other relationship access fail loudly instead of emitting SQL per project.
+_application_count = (
+    select(func.count(Application.id))
+    .where(Application.project_id == ProjectPost.id)
+    .correlate(ProjectPost)
+    .scalar_subquery()
+)
+_PROJECT_CARD_LOADS = (
+    joinedload(ProjectPost.creator, innerjoin=True).joinedload(User.profile),
+    with_expression(ProjectPost.application_count, _application_count),
+    raiseload("*"),
+)
+_PROJECT_TEAM_LOAD = (
+    selectinload(ProjectPost.collaborations)
+    .selectinload(Collaboration.collaborator)
+    .joinedload(User.profile)
+)
+
+
 async def get_project_by_id(db: AsyncSession, project_id: int) -> Optional[ProjectPost]:
     result = await db.execute(
         select(ProjectPost)
-        .options(selectinload(ProjectPost.creator).selectinload(User.profile))
-        .options(selectinload(ProjectPost.collaborations).selectinload(Collaboration.collaborator).selectinload(User.profile))
-        .options(selectinload(ProjectPost.applications))
+        .options(_PROJECT_TEAM_LOAD, *_PROJECT_CARD_LOADS)
+        .where(ProjectPost.id == project_id)
+        # Re-read an already loaded project so the count and team are current
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_project_row(db: AsyncSession, project_id: int) -> Optional[ProjectPost]:
+    """
+    The project's own columns, for ownership and status checks; nothing is
+    eager-loaded and relationship access raises.
+    """
+    result = await db.execute(
+        select(ProjectPost)
+        .options(raiseload("*"))
         .where(ProjectPost.id == project_id)
     )
     return result.scalar_one_or_none()
 
 
 async def update_project(db: AsyncSession, project: ProjectPost, data: dict) -> ProjectPost:
-    for key, value in data.items():
+    for key, value in _coerce_enums(data).items():
         if value is not None:
-            if key == "status":
-                setattr(project, key, ProjectStatus(value))
-            elif key == "category":
-                setattr(project, key, ProjectCategory(value))
-            elif key == "duration":
-                setattr(project, key, ProjectDuration(value))
-            elif key == "visibility":
-                setattr(project, key, ProjectVisibility(value))
-            else:
-                setattr(project, key, value)
+            setattr(project, key, value)
+    # No refresh: nothing is generated server-side on update, and a refresh would
+    # expire the team loaded with the project. The flush still expires the
+    # selected application count, so it is put back.
+    application_count = project.application_count
     await db.commit()
-    await db.refresh(project)
+    set_committed_value(project, "application_count", application_count)
     return project
 
 
-async def increment_project_views(db: AsyncSession, project: ProjectPost) -> None:
-    project.views_count += 1
-    await db.commit()
+# Project views are tallied in memory and written in batches by
+# flush_project_views, which the app lifespan runs every VIEW_FLUSH_INTERVAL
+# seconds. Increments are additive, so each worker flushes its own tally.
+_pending_views: Counter = Counter()
+
+
+def record_project_view(project_id: int) -> None:
+    _pending_views[project_id] += 1
+
+
+async def flush_project_views() -> None:
+    """Add the tallied views to views_count in one executemany UPDATE, on its own session."""
+    if not _pending_views:
+        return
+    pending = dict(_pending_views)
+    _pending_views.clear()
+    
+    projects = ProjectPost.__table__
+    try:
+        async with async_session_maker() as db:
+            await db.execute(
+                update(projects)
+                .where(projects.c.id == bindparam("pid"))
+                .values(views_count=projects.c.views_count + bindparam("delta")),
+                [{"pid": project_id, "delta": views} for project_id, views in pending.items()]
+            )
+            await db.commit()
+    except Exception:
+        _pending_views.update(pending)  # retried on the next flush
+        raise
+
+
+def _json_array_overlaps(dialect: str, column, values: List[str]):
+    """True where `column`, a JSON array of strings, holds any of `values`."""
+    if dialect == "postgresql":
+        # ?| is false (not an error) for a stored JSON null
+        return cast(column, JSONB).op("?|")(array(values))
+    elements = func.json_each(column).table_valued("value")  # SQLite
+    return exists(select(1).select_from(elements).where(elements.c.value.in_(values)))
 
 
 async def list_projects(
@@ -78,11 +156,16 @@ async def list_projects(
     duration: Optional[str] = None,
     search: Optional[str] = None,
     status: Optional[str] = None,
-) -> List[ProjectPost]:
+    before: Optional[Tuple[datetime, int]] = None,
+) -> Tuple[List[ProjectPost], Optional[ProjectPost]]:
+    """
+    One feed page, newest first. `before` is a decoded (created_at, id) cursor;
+    when given, the page starts just after it and `skip` is ignored. Returns the
+    projects and, if more rows follow, the last one (the next cursor).
+    """
     query = (
         select(ProjectPost)
-        .options(selectinload(ProjectPost.creator).selectinload(User.profile))
-        .options(selectinload(ProjectPost.applications))
+        .options(*_PROJECT_CARD_LOADS)
         .where(ProjectPost.visibility == ProjectVisibility.PUBLIC)
     )
     
@@ -109,26 +192,34 @@ async def list_projects(
         )
         query = query.where(search_filter)
     
-    query = query.order_by(ProjectPost.created_at.desc()).offset(skip).limit(limit)
-    
-    result = await db.execute(query)
-    projects = result.scalars().all()
-    
+    dialect = db.get_bind().dialect.name
     if tech_stack:
-        projects = [p for p in projects if any(t in (p.tech_stack or []) for t in tech_stack)]
+        query = query.where(_json_array_overlaps(dialect, ProjectPost.tech_stack, tech_stack))
     
     if role:
-        projects = [p for p in projects if role in (p.roles_needed or [])]
+        query = query.where(_json_array_overlaps(dialect, ProjectPost.roles_needed, [role]))
     
-    return projects
+    if before is not None:
+        query = query.where(tuple_(ProjectPost.created_at, ProjectPost.id) < before)
+    else:
+        query = query.offset(skip)
+    # One extra row tells whether another page follows
+    query = query.order_by(ProjectPost.created_at.desc(), ProjectPost.id.desc()).limit(limit + 1)
+    
+    result = await db.execute(query)
+    projects = result.scalars().all()
+    boundary = None
+    if len(projects) > limit:
+        projects = projects[:limit]
+        boundary = projects[-1]
+    
+    return projects, boundary
 
 
 async def get_user_projects(db: AsyncSession, user_id: int) -> List[ProjectPost]:
     result = await db.execute(
         select(ProjectPost)
-        .options(selectinload(ProjectPost.creator).selectinload(User.profile))
-        .options(selectinload(ProjectPost.applications))
-        .options(selectinload(ProjectPost.collaborations).selectinload(Collaboration.collaborator).selectinload(User.profile))
+        .options(*_PROJECT_CARD_LOADS)
         .where(ProjectPost.creator_id == user_id)
         .order_by(ProjectPost.created_at.desc())
     )
@@ -141,7 +232,11 @@ async def create_application(
     applicant_id: int,
     proposed_role: str,
     cover_letter: str
-) -> Application:
+) -> Optional[Application]:
+    """
+    Returns None when the applicant already has an open application to the
+    project (the partial unique index catches concurrent duplicates).
+    """
     application = Application(
         project_id=project_id,
         applicant_id=applicant_id,
@@ -149,16 +244,31 @@ async def create_application(
         cover_letter=cover_letter
     )
     db.add(application)
-    await db.commit()
-    await db.refresh(application)
-    return application
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return None
+    # Columns are already populated (expire_on_commit=False); load the
+    # relationships the response needs instead of refresh + a second fetch
+    return await get_application_by_id(db, application.id)
+
+
+# What build_application_response reads. Every hop is many-to-one, so it is all
+# joined into the application SELECT instead of one selectin query per level.
+_APPLICATION_LOADS = (
+    joinedload(Application.applicant, innerjoin=True).joinedload(User.profile),
+    joinedload(Application.project, innerjoin=True)
+    .joinedload(ProjectPost.creator, innerjoin=True)
+    .joinedload(User.profile),
+    raiseload("*"),
+)
 
 
 async def get_application_by_id(db: AsyncSession, application_id: int) -> Optional[Application]:
     result = await db.execute(
         select(Application)
-        .options(selectinload(Application.applicant).selectinload(User.profile))
-        .options(selectinload(Application.project).selectinload(ProjectPost.creator).selectinload(User.profile))
+        .options(*_APPLICATION_LOADS)
         .where(Application.id == application_id)
     )
     return result.scalar_one_or_none()
@@ -178,10 +288,39 @@ async def get_existing_application(db: AsyncSession, project_id: int, applicant_
     return result.scalar_one_or_none()
 
 
+async def get_project_and_existing_application(
+    db: AsyncSession,
+    project_id: int,
+    applicant_id: int
+) -> Tuple[Optional[ProjectPost], Optional[Application]]:
+    """
+    The project (columns only, no relationships) and the user's open application
+    to it, if any, in one query. Returns (None, None) when the project is missing.
+    """
+    result = await db.execute(
+        select(ProjectPost, Application)
+        .outerjoin(
+            Application,
+            and_(
+                Application.project_id == ProjectPost.id,
+                Application.applicant_id == applicant_id,
+                Application.status.notin_([ApplicationStatus.WITHDRAWN, ApplicationStatus.REJECTED])
+            )
+        )
+        .options(raiseload("*"))
+        .where(ProjectPost.id == project_id)
+    )
+    row = result.first()
+    if row is None:
+        return None, None
+    return row[0], row[1]
+
+
 async def get_project_applications(db: AsyncSession, project_id: int) -> List[Application]:
+    # Relationships are not loaded; callers batch-load applicant profiles by applicant_id
     result = await db.execute(
         select(Application)
-        .options(selectinload(Application.applicant).selectinload(User.profile))
+        .options(raiseload("*"))
         .where(Application.project_id == project_id)
         .order_by(Application.created_at.desc())
     )
@@ -191,14 +330,33 @@ async def get_project_applications(db: AsyncSession, project_id: int) -> List[Ap
 async def get_user_applications(db: AsyncSession, user_id: int) -> List[Application]:
     result = await db.execute(
         select(Application)
-        .options(selectinload(Application.applicant).selectinload(User.profile))
-        .options(selectinload(Application.project).selectinload(ProjectPost.creator).selectinload(User.profile))
+        .options(*_APPLICATION_LOADS)
         .where(Application.applicant_id == user_id)
         .order_by(Application.created_at.desc())
     )
     return result.scalars().all()
 
 
+_APPLICATION_BATCH = 100
+
+
+async def stream_user_applications(db: AsyncSession, user_id: int) -> AsyncIterator[Sequence[Application]]:
+    """
+    get_user_applications in batches of _APPLICATION_BATCH, read from a
+    server-side cursor so the whole list is never held at once. Every eager
+    load is many-to-one, so each row arrives complete.
+    """
+    result = await db.stream(
+        select(Application)
+        .options(*_APPLICATION_LOADS)
+        .where(Application.applicant_id == user_id)
+        .order_by(Application.created_at.desc())
+        .execution_options(yield_per=_APPLICATION_BATCH)
+    )
+    async for applications in result.scalars().partitions():
+        yield applications
+
+
 async def update_application_status(
     db: AsyncSession,
     application: Application,
@@ -215,16 +373,30 @@ async def update_application_status(
     else:
         raise ValueError("Invalid status update")
     
+    # Every changed column was set here, so no refresh: the caller's loaded
+    # applicant/project relationships stay usable for the response
     await db.commit()
-    await db.refresh(application)
     return application
 
 
 async def mark_application_viewed(db: AsyncSession, application: Application) -> Application:
-    if application.status == ApplicationStatus.PENDING:
-        application.status = ApplicationStatus.VIEWED
-        await db.commit()
-        await db.refresh(application)
+    """
+    Flip a pending application to viewed. The UPDATE only matches a row that is
+    still pending, so a concurrent accept/reject or second viewer isn't undone.
+    """
+    if application.status != ApplicationStatus.PENDING:
+        return application
+    result = await db.execute(
+        update(Application)
+        .where(
+            and_(Application.id == application.id, Application.status == ApplicationStatus.PENDING)
+        )
+        .values(status=ApplicationStatus.VIEWED)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if result.rowcount:
+        set_committed_value(application, "status", ApplicationStatus.VIEWED)
     return application
 
 
@@ -241,7 +413,6 @@ async def create_collaboration(
     )
     db.add(collaboration)
     await db.commit()
-    await db.refresh(collaboration)
     return collaboration
 
 
@@ -263,6 +434,7 @@ async def get_project_collaborations(db: AsyncSession, project_id: int) -> List[
     result = await db.execute(
         select(Collaboration)
         .options(selectinload(Collaboration.collaborator).selectinload(User.profile))
+        .options(raiseload("*"))
         .where(
             and_(
                 Collaboration.project_id == project_id,
@@ -278,6 +450,7 @@ async def get_user_collaborations(db: AsyncSession, user_id: int) -> List[Collab
         select(Collaboration)
         .options(selectinload(Collaboration.project).selectinload(ProjectPost.creator).selectinload(User.profile))
         .options(selectinload(Collaboration.collaborator).selectinload(User.profile))
+        .options(raiseload("*"))
         .where(
             and_(
                 Collaboration.collaborator_id == user_id,
@@ -288,70 +461,101 @@ async def get_user_collaborations(db: AsyncSession, user_id: int) -> List[Collab
     return result.scalars().all()
 
 
-async def leave_collaboration(db: AsyncSession, collaboration: Collaboration) -> Collaboration:
-    collaboration.status = CollaborationStatus.LEFT
-    collaboration.ended_at = datetime.now(timezone.utc)
+async def _end_collaboration(db: AsyncSession, collaboration_id: int, status: CollaborationStatus) -> None:
+    # ended_at is stamped by the database; the loaded object is left as it was
+    await db.execute(
+        update(Collaboration)
+        .where(Collaboration.id == collaboration_id)
+        .values(status=status, ended_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
     await db.commit()
-    await db.refresh(collaboration)
-    return collaboration
 
 
-async def remove_collaborator(db: AsyncSession, collaboration: Collaboration) -> Collaboration:
-    collaboration.status = CollaborationStatus.REMOVED
-    collaboration.ended_at = datetime.now(timezone.utc)
-    await db.commit()
-    await db.refresh(collaboration)
-    return collaboration
+async def leave_collaboration(db: AsyncSession, collaboration: Collaboration) -> None:
+    await _end_collaboration(db, collaboration.id, CollaborationStatus.LEFT)
 
 
-async def get_or_create_team_conversation(db: AsyncSession, project_id: int) -> Conversation:
+async def remove_collaborator(db: AsyncSession, collaboration: Collaboration) -> None:
+    await _end_collaboration(db, collaboration.id, CollaborationStatus.REMOVED)
+
+
+_TEAM_CHAT = ConversationType.TEAM_CHAT
+
+
+async def _find_team_conversation(db: AsyncSession, project_id: int) -> Optional[Conversation]:
     result = await db.execute(
         select(Conversation)
-        .where(
-            and_(
-                Conversation.project_id == project_id,
-                Conversation.type == ConversationType.TEAM_CHAT
-            )
-        )
+        .options(raiseload("*"))
+        .where(and_(Conversation.project_id == project_id, Conversation.type == _TEAM_CHAT))
     )
-    conversation = result.scalar_one_or_none()
+    return result.scalar_one_or_none()
+
+
+def _dialect_insert(db: AsyncSession):
+    """insert() of the bound dialect, for ON CONFLICT clauses."""
+    return pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+
+
+async def get_or_create_team_conversation(db: AsyncSession, project_id: int) -> Conversation:
+    """
+    The project's team chat; participants are not loaded. A missing one is
+    created straight from the project row with its creator as the first
+    participant, yielding to a concurrent creation through the unique index.
+    """
+    conversation = await _find_team_conversation(db, project_id)
+    if conversation:
+        return conversation
     
-    if not conversation:
-        project = await get_project_by_id(db, project_id)
-        if not project:
-            raise ValueError("Project not found")
-        
-        conversation = Conversation(
-            project_id=project_id,
-            participant_ids=[project.creator_id],
-            type=ConversationType.TEAM_CHAT
+    conversation = await db.scalar(
+        _dialect_insert(db)(Conversation)
+        .from_select(
+            ["project_id", "type", "created_at"],
+            select(
+                ProjectPost.id,
+                literal(_TEAM_CHAT, Conversation.type.type),
+                literal(datetime.now(timezone.utc), Conversation.created_at.type),
+            ).where(ProjectPost.id == project_id)
         )
-        db.add(conversation)
-        await db.commit()
-        await db.refresh(conversation)
+        .on_conflict_do_nothing(index_elements=["project_id"], index_where=TEAM_CHAT_WHERE)
+        .returning(Conversation)
+    )
+    if conversation is None:
+        # Either the project is gone or another request created the chat first
+        conversation = await _find_team_conversation(db, project_id)
+        if not conversation:
+            raise ValueError("Project not found")
+        return conversation
     
+    await db.execute(
+        insert(ConversationParticipant).from_select(
+            ["conversation_id", "user_id"],
+            select(literal(conversation.id), ProjectPost.creator_id).where(ProjectPost.id == project_id)
+        )
+    )
+    await db.commit()
     return conversation
 
 
-async def add_participant_to_conversation(
-    db: AsyncSession,
-    conversation: Conversation,
-    user_id: int
-) -> Conversation:
-    if user_id not in conversation.participant_ids:
-        conversation.participant_ids = conversation.participant_ids + [user_id]
-        await db.commit()
-        await db.refresh(conversation)
-    return conversation
+async def add_participant_to_conversation(db: AsyncSession, conversation_id: int, user_id: int) -> None:
+    """Add the user unless already a participant; concurrent adds hit the primary key and do nothing."""
+    await db.execute(
+        _dialect_insert(db)(ConversationParticipant)
+        .values(conversation_id=conversation_id, user_id=user_id)
+        .on_conflict_do_nothing(index_elements=["user_id", "conversation_id"])
+    )
+    await db.commit()
 
 
-async def remove_participant_from_conversation(
-    db: AsyncSession,
-    conversation: Conversation,
-    user_id: int
-) -> Conversation:
-    if user_id in conversation.participant_ids:
-        conversation.participant_ids = [p for p in conversation.participant_ids if p != user_id]
-        await db.commit()
-        await db.refresh(conversation)
-    return conversation
+async def remove_participant_from_conversation(db: AsyncSession, conversation_id: int, user_id: int) -> None:
+    await db.execute(
+        delete(ConversationParticipant)
+        .where(
+            and_(
+                ConversationParticipant.conversation_id == conversation_id,
+                ConversationParticipant.user_id == user_id
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
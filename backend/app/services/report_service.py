@@ -1,5 +1,5 @@
 from typing import List, Optional
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import Report, ReportReason, ReportStatus
 
@@ -21,10 +21,25 @@ async def create_report(
     )
     db.add(report)
     await db.commit()
-    await db.refresh(report)
     return report
 
 
+# Rows per INSERT; 1000 x 6 columns stays well under Postgres' 65535 bind parameters
+_BULK_INSERT_BATCH = 1000
+
+
+async def create_reports_bulk(db: AsyncSession, rows: List[dict]) -> None:
+    """
+    Insert many reports (create_report's keyword arguments, one dict each) as
+    batched multi-row INSERTs in one transaction, for moderation tooling and
+    replays.
+    """
+    rows = [{**row, "reason": ReportReason(row["reason"])} for row in rows]
+    for start in range(0, len(rows), _BULK_INSERT_BATCH):
+        await db.execute(insert(Report), rows[start:start + _BULK_INSERT_BATCH])
+    await db.commit()
+
+
 async def get_report_by_id(db: AsyncSession, report_id: int) -> Optional[Report]:
     result = await db.execute(select(Report).where(Report.id == report_id))
     return result.scalar_one_or_none()
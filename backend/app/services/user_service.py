@@ -1,56 +1,206 @@
-from datetime import datetime, timezone
-from typing import Optional
-from sqlalchemy import select
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Set
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+import orjson
 from app.models import User, Profile, AccountStatus
-from app.core.security import get_password_hash, verify_password
+from app.core.cache import cache, user_profile_key
+from app.db.database import async_session_maker
+from app.core.security import aget_password_hash, averify_password_cached, password_needs_rehash
+
+
+# last_active is informational; minute resolution is plenty
+LAST_ACTIVE_RESOLUTION = timedelta(seconds=60)
+
+# "No such user" by email, so enumeration probes and logins for unknown
+# addresses skip the users query. Only used with a shared (Redis) cache: a
+# per-process entry would keep refusing an account registered on another
+# worker. create_user overwrites the entry with _KNOWN_USER, and absences are
+# only ever added (SET NX), so a probe that read before the registration
+# committed can't write its stale answer back.
+_CREDENTIALS_TTL = 60
+_NO_SUCH_USER = b"0"
+_KNOWN_USER = b"1"
+
+
+# Users by id for get_current_user, so authenticated requests skip the users
+# query. Shared cache only, like the credentials cache. Each entry is tagged
+# with the user's auth generation as read before the row was loaded;
+# forget_authenticated_user bumps the generation after the password, token
+# version or verification status changes, so an entry written from a row read
+# before that change (by a request already in flight) is never served.
+_AUTH_USER_TTL = 300
+_AUTH_GENERATION_TTL = 86400  # must outlive _AUTH_USER_TTL
+
+
+def _auth_user_key(user_id: int) -> str:
+    return f"user:id:{user_id}"
+
+
+def _auth_generation_key(user_id: int) -> str:
+    return f"user:{user_id}:tv"
+
+
+def _last_active_key(user_id: int) -> str:
+    return f"user:{user_id}:active"
+
+
+def _generation_str(generation: Optional[bytes]) -> Optional[str]:
+    return generation.decode() if generation is not None else None
+
+
+async def _cache_auth_user(user: User, generation: Optional[str]) -> None:
+    snapshot = orjson.dumps({
+        "generation": generation,
+        "id": user.id,
+        "email": user.email,
+        "email_verified": user.email_verified,
+        "token_version": user.token_version,
+        "created_at": user.created_at,
+        "last_active": user.last_active,
+        "account_status": user.account_status.value,
+    })
+    # NX: never replace an entry another request wrote
+    await cache.add(_auth_user_key(user.id), snapshot, _AUTH_USER_TTL)
+
+
+def _user_from_snapshot(fields: dict) -> User:
+    for key in ("created_at", "last_active"):
+        if fields[key] is not None:
+            fields[key] = datetime.fromisoformat(fields[key])
+    fields["account_status"] = AccountStatus(fields["account_status"])
+    user = User(**fields)
+    # Present it as a detached, already-persisted row so merge(load=False) accepts it
+    make_transient_to_detached(user)
+    return user
+
+
+def _credentials_key(email: str) -> str:
+    return f"user:email:{email.lower()}"
 
 
 async def create_user(db: AsyncSession, email: str, password: str) -> User:
-    password_hash = get_password_hash(password)
+    # Stored lower-cased: emails are unique and looked up case-insensitively
+    email = email.strip().lower()
+    password_hash = await aget_password_hash(password)
     user = User(email=email, password_hash=password_hash)
     db.add(user)
     await db.commit()
-    await db.refresh(user)
+    if cache.shared:
+        await cache.set(_credentials_key(email), _KNOWN_USER, _CREDENTIALS_TTL)
     return user
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
-    result = await db.execute(select(User).where(User.email == email))
+    result = await db.execute(select(User).where(func.lower(User.email) == func.lower(email)))
     return result.scalar_one_or_none()
 
 
 async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
-    result = await db.execute(select(User).where(User.id == user_id))
-    return result.scalar_one_or_none()
+    # A user already loaded in this session (e.g. the authenticated one) comes
+    # from the identity map without a query
+    return await db.get(User, user_id)
+
+
+async def get_authenticated_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """
+    get_user_by_id for request authentication. With a shared cache the row comes
+    from there and is merged into `db` without a query, so handlers can still
+    modify and commit it.
+    """
+    if not cache.shared:
+        return await get_user_by_id(db, user_id)
+    
+    key = _auth_user_key(user_id)
+    cached, generation = await cache.get_many([key, _auth_generation_key(user_id)])
+    generation = _generation_str(generation)
+    if cached is not None:
+        fields = orjson.loads(cached)
+        if fields.pop("generation") == generation:
+            # password_hash is left unloaded, so it is fetched only if read
+            return await db.merge(_user_from_snapshot(fields), load=False)
+        await cache.delete(key)
+    
+    user = await get_user_by_id(db, user_id)
+    if user is not None:
+        await _cache_auth_user(user, generation)
+    return user
+
+
+async def forget_authenticated_user(user_id: int) -> None:
+    """Retire the cached auth row after committing a change to anything authentication checks."""
+    if cache.shared:
+        await cache.set(_auth_generation_key(user_id), str(time.time_ns()), _AUTH_GENERATION_TTL)
+        await cache.delete(_auth_user_key(user_id))
 
 
 async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
-    user = await get_user_by_email(db, email)
+    if cache.shared and await cache.get(_credentials_key(email)) == _NO_SUCH_USER:
+        return None
+    
+    # Only the columns login reads
+    result = await db.execute(
+        select(User)
+        .options(load_only(User.id, User.email, User.password_hash, User.token_version))
+        .where(func.lower(User.email) == func.lower(email))
+    )
+    user = result.scalar_one_or_none()
     if not user:
+        if cache.shared:
+            await cache.add(_credentials_key(email), _NO_SUCH_USER, _CREDENTIALS_TTL)
         return None
-    if not verify_password(password, user.password_hash):
+    if not await averify_password_cached(password, user.password_hash):
         return None
+    if password_needs_rehash(user.password_hash):
+        # Upgrade legacy bcrypt / outdated argon2 hashes while we have the plaintext
+        user.password_hash = await aget_password_hash(password)
+        await db.commit()
+        await forget_authenticated_user(user.id)
     return user
 
 
 async def verify_user_email(db: AsyncSession, user: User) -> User:
     user.email_verified = True
     await db.commit()
-    await db.refresh(user)
+    await forget_authenticated_user(user.id)
     return user
 
 
 async def update_last_active(db: AsyncSession, user: User) -> None:
-    user.last_active = datetime.now(timezone.utc)
+    """Record activity, at most once per LAST_ACTIVE_RESOLUTION so most requests skip the write."""
+    now = datetime.now(timezone.utc)
+    last_active = user.last_active
+    if last_active is not None:
+        if last_active.tzinfo is None:  # SQLite drops the offset
+            last_active = last_active.replace(tzinfo=timezone.utc)
+        if now - last_active < LAST_ACTIVE_RESOLUTION:
+            return
+    # A cached auth row keeps the last_active it was built with, so with a shared
+    # cache the throttle is a key of its own; the auth row is never rewritten here
+    if cache.shared and not await cache.add(
+        _last_active_key(user.id), b"1", int(LAST_ACTIVE_RESOLUTION.total_seconds())
+    ):
+        return
+    # One UPDATE of the single column; the loaded user is brought in line without
+    # being marked dirty
+    await db.execute(
+        update(User)
+        .where(User.id == user.id)
+        .values(last_active=now)
+        .execution_options(synchronize_session=False)
+    )
     await db.commit()
+    set_committed_value(user, "last_active", now)
 
 
 async def update_user_password(db: AsyncSession, user: User, new_password: str) -> User:
-    user.password_hash = get_password_hash(new_password)
+    user.password_hash = await aget_password_hash(new_password)
     user.token_version += 1  # Invalidate all existing tokens
     await db.commit()
-    await db.refresh(user)
+    await forget_authenticated_user(user.id)
     return user
 
 
@@ -59,6 +209,21 @@ async def get_profile_by_user_id(db: AsyncSession, user_id: int) -> Optional[Pro
     return result.scalar_one_or_none()
 
 
+async def fetch_profile_by_user_id(user_id: int) -> Optional[Profile]:
+    """get_profile_by_user_id in its own session, so it can run alongside work on the request's session."""
+    async with async_session_maker() as db:
+        return await get_profile_by_user_id(db, user_id)
+
+
+async def get_profiles_by_user_ids(db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, Profile]:
+    """Batch-load profiles for many users in one query; returns {user_id: profile}."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    result = await db.execute(select(Profile).where(Profile.user_id.in_(user_ids)))
+    return {profile.user_id: profile for profile in result.scalars()}
+
+
 async def create_profile(db: AsyncSession, user_id: int, data: dict) -> Profile:
     # Remove links if it's a Pydantic model and convert to dict
     links = data.pop("links", None)
@@ -71,7 +236,7 @@ async def create_profile(db: AsyncSession, user_id: int, data: dict) -> Profile:
     )
     db.add(profile)
     await db.commit()
-    await db.refresh(profile)
+    await cache.delete(user_profile_key(user_id))
     return profile
 
 
@@ -83,10 +248,34 @@ async def update_profile(db: AsyncSession, profile: Profile, data: dict) -> Prof
             else:
                 setattr(profile, key, value)
     await db.commit()
-    await db.refresh(profile)
+    await cache.delete(user_profile_key(profile.user_id))
     return profile
 
 
+async def avatar_url_in_use(db: AsyncSession, avatar_url: str) -> bool:
+    """Whether any profile shows `avatar_url` (content-addressed files are shared)."""
+    result = await db.execute(select(Profile.id).where(Profile.avatar_url == avatar_url).limit(1))
+    return result.first() is not None
+
+
+async def get_avatar_urls(db: AsyncSession) -> Set[str]:
+    result = await db.execute(select(Profile.avatar_url).where(Profile.avatar_url.is_not(None)).distinct())
+    return set(result.scalars())
+
+
+async def replace_avatar_url(db: AsyncSession, current_url: str, new_url: str) -> None:
+    """Point every profile showing `current_url` at `new_url`."""
+    result = await db.execute(
+        update(Profile)
+        .where(Profile.avatar_url == current_url)
+        .values(avatar_url=new_url)
+        .returning(Profile.user_id)
+    )
+    user_ids = list(result.scalars())
+    await db.commit()
+    await cache.delete(*(user_profile_key(user_id) for user_id in user_ids))
+
+
 def check_profile_can_post(profile: Optional[Profile]) -> bool:
     if not profile:
         return False
@@ -1,23 +1,26 @@
 """Email verification service."""
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Tuple
+from typing import NamedTuple, Optional, Tuple
 from sqlalchemy import select, delete, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.verification import EmailVerification, VerificationRateLimit, VerificationType
 from app.models import User
+from app.core.rate_limit import count_attempt
+from app.core.redis_client import redis_client
 from app.core.verification_security import (
     generate_verification_data,
     verify_token_hash,
     is_expired,
-    hash_token,
+    hash_token_hex,
     mask_email,
     MAX_OTP_ATTEMPTS,
     OTP_EXPIRY_MINUTES,
     LINK_EXPIRY_MINUTES,
 )
 from app.services.email_service import send_verification_email, send_password_reset_email
+from app.services.user_service import forget_authenticated_user
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +30,16 @@ RATE_LIMIT_RESEND = 3  # Max resend requests per window
 RATE_LIMIT_VERIFY = 10  # Max verification attempts per window
 RATE_LIMIT_WINDOW_MINUTES = 15  # Window duration
 
+CLEANUP_BATCH_SIZE = 10_000  # Expired verifications deleted per transaction
+
+
+class VerificationEmail(NamedTuple):
+    """Everything needed to send a verification or password reset email."""
+    to_email: str
+    otp: str
+    link_token: str
+    verification_type: VerificationType
+
 
 class VerificationError(Exception):
     """Base exception for verification errors."""
@@ -79,7 +92,14 @@ async def check_rate_limit(
     action: str,
     max_attempts: int
 ) -> bool:
-    """Check rate limit. Returns True if allowed."""
+    """
+    Check rate limit. Returns True if allowed. With Redis the attempt is counted
+    there (one round-trip, no database write); otherwise in verification_rate_limits.
+    """
+    if redis_client is not None:
+        attempts = await count_attempt(f"rl:{action}:{identifier}", RATE_LIMIT_WINDOW_MINUTES * 60)
+        return attempts <= max_attempts
+    
     now = datetime.now(timezone.utc)
     window_start = now - timedelta(minutes=RATE_LIMIT_WINDOW_MINUTES)
     
@@ -125,8 +145,12 @@ async def create_email_verification(
     db: AsyncSession,
     user: User,
     verification_type: VerificationType = VerificationType.EMAIL_VERIFICATION
-) -> Tuple[str, str]:
-    """Create verification record and send email. Returns (otp, link_token)."""
+) -> Tuple[str, str, VerificationEmail]:
+    """
+    Create verification record. Returns (otp, link_token, email); the email is
+    not sent here so callers can hand it to deliver_verification_email after
+    the response.
+    """
     # Check rate limit for resending
     if not await check_rate_limit(db, str(user.id), "resend_otp", RATE_LIMIT_RESEND):
         raise RateLimitExceeded("Too many verification requests. Please wait before trying again.")
@@ -156,15 +180,16 @@ async def create_email_verification(
     db.add(verification)
     await db.commit()
     
-    # Send verification email
-    if verification_type == VerificationType.EMAIL_VERIFICATION:
-        await send_verification_email(user.email, otp, link_token)
-    else:
-        await send_password_reset_email(user.email, otp, link_token)
-    
     logger.info(f"Verification created for user {mask_email(user.email)}")
     
-    return otp, link_token
+    return otp, link_token, VerificationEmail(user.email, otp, link_token, verification_type)
+
+
+async def deliver_verification_email(email: VerificationEmail) -> bool:
+    """Send the email prepared by create_email_verification."""
+    if email.verification_type == VerificationType.EMAIL_VERIFICATION:
+        return await send_verification_email(email.to_email, email.otp, email.link_token)
+    return await send_password_reset_email(email.to_email, email.otp, email.link_token)
 
 
 async def verify_otp(
@@ -225,6 +250,8 @@ async def verify_otp(
         logger.info(f"Email verified for user {mask_email(user.email)} via OTP")
     
     await db.commit()
+    if verification_type == VerificationType.EMAIL_VERIFICATION:
+        await forget_authenticated_user(user.id)
     return True
 
 
@@ -234,7 +261,7 @@ async def verify_link_token(
     verification_type: VerificationType = VerificationType.EMAIL_VERIFICATION
 ) -> Optional[User]:
     """Verify link token. Returns User if successful."""
-    token_hash = hash_token(token)
+    token_hash = hash_token_hex(token)
     
     # Find verification record
     result = await db.execute(
@@ -276,6 +303,8 @@ async def verify_link_token(
         logger.info(f"Email verified for user {mask_email(user.email)} via link")
     
     await db.commit()
+    if verification_type == VerificationType.EMAIL_VERIFICATION:
+        await forget_authenticated_user(user.id)
     return user
 
 
@@ -302,18 +331,30 @@ async def cleanup_expired_verifications(db: AsyncSession) -> int:
     Clean up expired verification records.
     
     Should be run periodically via a background task.
-    Returns count of deleted records.
+    Returns count of deleted records. Deletes in batches, each its own short
+    transaction; rows locked by another cleanup run are skipped.
     """
     now = datetime.now(timezone.utc)
+    deleted = 0
     
-    result = await db.execute(
-        delete(EmailVerification).where(
-            and_(
-                EmailVerification.link_expires_at < now,
-                EmailVerification.is_used == False
+    while True:
+        batch = (
+            select(EmailVerification.id)
+            .where(
+                and_(
+                    EmailVerification.link_expires_at < now,
+                    EmailVerification.is_used == False
+                )
             )
+            .limit(CLEANUP_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
         )
-    )
-    
-    await db.commit()
-    return result.rowcount
+        result = await db.execute(
+            delete(EmailVerification)
+            .where(EmailVerification.id.in_(batch.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        deleted += result.rowcount
+        if result.rowcount < CLEANUP_BATCH_SIZE:
+            return deleted
@@ -0,0 +1,128 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core import cache as cache_module
+from app.db.database import Base
+from app.models import User
+from app.services import user_service
+
+try:
+    from fakeredis import FakeAsyncRedis
+except ImportError:  # optional: only these tests need it
+    FakeAsyncRedis = None
+
+
+@unittest.skipIf(FakeAsyncRedis is None, "fakeredis is not installed")
+class AuthUserCacheRevocationTests(unittest.IsolatedAsyncioTestCase):
+    """A password reset must win over requests that loaded the user before it."""
+
+    async def asyncSetUp(self):
+        patcher = mock.patch.object(cache_module, "redis_client", FakeAsyncRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        self.addAsyncCleanup(engine.dispose)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+        async with self.sessions() as db:
+            user = User(
+                email="user@example.com",
+                password_hash="x",
+                last_active=datetime.now(timezone.utc) - timedelta(hours=1),
+            )
+            db.add(user)
+            await db.commit()
+            self.user_id = user.id
+
+    async def _reset_password(self) -> None:
+        async with self.sessions() as db:
+            user = await db.get(User, self.user_id)
+            await user_service.update_user_password(db, user, "new-password-123")
+
+    async def _token_version(self) -> int:
+        async with self.sessions() as db:
+            user = await user_service.get_authenticated_user(db, self.user_id)
+            return user.token_version
+
+    async def test_last_active_write_after_reset_keeps_new_token_version(self):
+        async with self.sessions() as db:
+            user = await user_service.get_authenticated_user(db, self.user_id)
+            await self._reset_password()
+            await user_service.update_last_active(db, user)
+        self.assertEqual(await self._token_version(), 1)
+
+    async def test_row_loaded_before_reset_is_not_served_after_it(self):
+        load = user_service.get_user_by_id
+
+        async def load_then_reset(db, user_id):
+            user = await load(db, user_id)
+            await self._reset_password()
+            return user
+
+        async with self.sessions() as db:
+            with mock.patch.object(user_service, "get_user_by_id", load_then_reset):
+                stale = await user_service.get_authenticated_user(db, self.user_id)
+        self.assertEqual(stale.token_version, 0)
+        self.assertEqual(await self._token_version(), 1)
+
+    async def test_last_active_is_written_once_per_resolution(self):
+        async with self.sessions() as db:
+            user = await user_service.get_authenticated_user(db, self.user_id)
+            with mock.patch.object(db, "execute", wraps=db.execute) as execute:
+                await user_service.update_last_active(db, user)
+                user.last_active = datetime.now(timezone.utc) - timedelta(hours=1)
+                await user_service.update_last_active(db, user)
+        self.assertEqual(execute.await_count, 1)
+
+
+@unittest.skipIf(FakeAsyncRedis is None, "fakeredis is not installed")
+class LoginCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = FakeAsyncRedis()
+        patcher = mock.patch.object(cache_module, "redis_client", self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        self.addAsyncCleanup(engine.dispose)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def _login(self, email: str, password: str):
+        async with self.sessions() as db:
+            return await user_service.authenticate_user(db, email, password)
+
+    async def test_password_hash_is_never_cached(self):
+        async with self.sessions() as db:
+            await user_service.create_user(db, "user@example.com", "right-password-1")
+        self.assertIsNone(await self._login("user@example.com", "wrong-password-1"))
+        self.assertIsNotNone(await self._login("user@example.com", "right-password-1"))
+        for key in await self.redis.keys("*"):
+            self.assertNotIn(b"$argon2", await self.redis.get(key))
+
+    async def test_probe_in_flight_during_registration_does_not_block_login(self):
+        execute_probe = None
+
+        async def register_during_probe(statement):
+            result = await execute_probe(statement)
+            async with self.sessions() as other:
+                await user_service.create_user(other, "new@example.com", "new-password-1")
+            return result
+
+        async with self.sessions() as db:
+            execute_probe = db.execute
+            with mock.patch.object(db, "execute", register_during_probe):
+                self.assertIsNone(await user_service.authenticate_user(db, "new@example.com", "new-password-1"))
+        self.assertIsNotNone(await self._login("new@example.com", "new-password-1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from app.routers import profile
+
+
+def _write_gif(path: str, size: int, count: int) -> None:
+    frames = [Image.new("L", (size, size), i * 255 // count) for i in range(count)]
+    durations = [40 + 10 * i for i in range(count)]  # GIF stores centiseconds
+    frames[0].save(path, "GIF", save_all=True, append_images=frames[1:], duration=durations, loop=0)
+
+
+class TranscodeAvatarTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        patcher = mock.patch.object(profile, "UPLOAD_DIR", self.dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _transcode(self, size: int, count: int) -> Image.Image:
+        src = os.path.join(self.dir, "src.gif")
+        _write_gif(src, size, count)
+        name = profile._transcode_avatar(src, f"{size}x{count}")
+        image = Image.open(os.path.join(self.dir, name))
+        self.addCleanup(image.close)
+        return image
+
+    def test_small_animation_keeps_frames_and_durations(self):
+        image = self._transcode(64, 3)
+        durations = []
+        for index in range(image.n_frames):
+            image.seek(index)
+            image.load()
+            durations.append(image.info["duration"])
+        self.assertEqual(durations, [40, 50, 60])
+
+    def test_too_many_frames_keeps_only_the_first(self):
+        image = self._transcode(16, profile.AVATAR_MAX_FRAMES + 1)
+        self.assertEqual(getattr(image, "n_frames", 1), 1)
+
+    def test_too_many_pixels_keeps_only_the_first(self):
+        with mock.patch.object(profile, "AVATAR_MAX_ANIMATION_PIXELS", 3 * 256 * 256 - 1):
+            image = self._transcode(256, 3)
+        self.assertEqual(getattr(image, "n_frames", 1), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
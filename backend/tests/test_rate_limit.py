@@ -0,0 +1,58 @@
+import unittest
+from ipaddress import ip_network
+from unittest import mock
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from app.core import rate_limit
+from app.core.rate_limit import RateLimiter
+
+
+def _make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/limited", dependencies=[Depends(RateLimiter(times=1, seconds=60))])
+    async def limited():
+        return {"ok": True}
+
+    return app
+
+
+class RateLimiterClientIpTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        rate_limit._local_windows.clear()
+        patcher = mock.patch.object(rate_limit, "_TRUSTED_PROXIES", [ip_network("10.0.0.0/24")])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _client(self, peer: str) -> httpx.AsyncClient:
+        transport = httpx.ASGITransport(app=_make_app(), client=(peer, 40000))
+        return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+    async def test_forwarded_clients_behind_trusted_proxy_get_separate_buckets(self):
+        async with self._client("10.0.0.5") as client:
+            first = await client.get("/limited", headers={"X-Forwarded-For": "203.0.113.1"})
+            again = await client.get("/limited", headers={"X-Forwarded-For": "203.0.113.1"})
+            other = await client.get("/limited", headers={"X-Forwarded-For": "203.0.113.2"})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(again.status_code, 429)
+        self.assertEqual(other.status_code, 200)
+
+    async def test_spoofed_hops_left_of_the_client_are_ignored(self):
+        async with self._client("10.0.0.5") as client:
+            first = await client.get("/limited", headers={"X-Forwarded-For": "198.51.100.7, 203.0.113.1"})
+            again = await client.get("/limited", headers={"X-Forwarded-For": "198.51.100.8, 203.0.113.1"})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(again.status_code, 429)
+
+    async def test_forwarded_header_from_untrusted_peer_is_ignored(self):
+        async with self._client("192.0.2.10") as client:
+            first = await client.get("/limited", headers={"X-Forwarded-For": "203.0.113.1"})
+            again = await client.get("/limited", headers={"X-Forwarded-For": "203.0.113.2"})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(again.status_code, 429)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import base64
+import unittest
+
+from app.core.security import create_access_token, decode_token
+
+_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+
+class TokenEncodingTests(unittest.TestCase):
+    def setUp(self):
+        self.token = create_access_token({"sub": "1"})
+        self.signing_input, _, self.signature = self.token.rpartition(".")
+
+    def _with_signature(self, signature: str) -> str:
+        return f"{self.signing_input}.{signature}"
+
+    def test_issued_token_decodes(self):
+        self.assertEqual(decode_token(self.token)["sub"], "1")
+
+    def test_equivalent_signature_spelling_is_rejected(self):
+        # The last character of a 32-byte signature carries two unused bits
+        last = _ALPHABET.index(self.signature[-1].encode())
+        tampered = self.signature[:-1] + chr(_ALPHABET[last ^ 1])
+        self.assertEqual(
+            base64.urlsafe_b64decode(tampered + "="),
+            base64.urlsafe_b64decode(self.signature + "="),
+        )
+        self.assertIsNone(decode_token(self._with_signature(tampered)))
+
+    def test_stray_characters_are_rejected(self):
+        for tampered in (self.signature[:5] + "!" + self.signature[5:], self.signature + "="):
+            with self.subTest(signature=tampered):
+                self.assertIsNone(decode_token(self._with_signature(tampered)))
+
+
+if __name__ == "__main__":
+    unittest.main()
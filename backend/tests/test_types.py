@@ -0,0 +1,30 @@
+import enum
+import unittest
+
+from app.db.types import IntEnumType, enum_code
+
+
+class Color(enum.Enum):
+    RED = "red"
+    GREEN = "green"
+    BLUE = "blue"
+
+
+class IntEnumTypeTests(unittest.TestCase):
+    def setUp(self):
+        self.type = IntEnumType(Color)
+
+    def test_codes_round_trip(self):
+        for member in Color:
+            code = self.type.process_bind_param(member, None)
+            self.assertEqual(code, enum_code(member))
+            self.assertIs(self.type.process_result_value(code, None), member)
+
+    def test_out_of_range_codes_are_rejected(self):
+        for code in (0, -1, len(Color) + 1):
+            with self.assertRaises(ValueError):
+                self.type.process_result_value(code, None)
+
+
+if __name__ == "__main__":
+    unittest.main()